@@ -0,0 +1,391 @@
+"""
+Adapter throughput against a local stub ATS server.
+
+    python -m bench.adapters [--ats Greenhouse ...] [--sizes 50,1000,10000] [--repeat 3]
+                             [--save-baseline PATH] [--compare PATH] [--tolerance 0.25]
+                             [--latency-ms 80]
+    python -m bench.adapters --record Greenhouse --company Affirm URL
+
+Every adapter's fetch_jobs runs against boards of each size, expanded from
+the anonymized fixtures in bench/fixtures/ and served by an aiohttp stub in
+a separate process. The real ATS hostnames resolve to the stub, so feed URLs
+look exactly like those in companies.yaml. Reports jobs/sec, peak traced
+memory (separate tracemalloc pass) and event-loop blocking seen by a 1 ms
+ticker. --latency-ms delays every stub response, which is what paged
+feeds (SmartRecruiters, Workday) are bound by in production. --compare
+exits 1 when a result regresses past --tolerance. Throughput depends on the
+machine, so no baseline is checked in: save one with --save-baseline
+before a change and compare against it on the same machine after.
+"""
+import argparse
+import asyncio
+import copy
+import importlib
+import json
+import multiprocessing
+import re
+import socket
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+from aiohttp.abc import AbstractResolver
+
+from src.crawler.config import load_config
+from src.crawler.http_client import HttpStats, create_http_session
+from src.crawler.schemas import FetchState
+
+FIXTURES = Path(__file__).with_name("fixtures")
+DEFAULT_SIZES = (50, 1000, 10000)
+STALL_FLOOR_MS = 5.0   # stall deltas below this are scheduler noise, never a regression
+
+
+# ── fixtures ───────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Fixture:
+    ats: str
+    file: str
+    url: str                                  # feed URL, "{slug}" marks the board
+    list_key: Optional[str]                   # where postings live (None = top-level array)
+    rekey: Callable[[dict, int], None]        # give clone i a unique id, in place
+    paged: bool = False
+
+    def load(self) -> Any:
+        return json.loads((FIXTURES / self.file).read_text())
+
+    def postings(self, payload: Any) -> List[dict]:
+        return payload if self.list_key is None else payload[self.list_key]
+
+    def expand(self, n: int) -> Tuple[Any, List[dict]]:
+        """The fixture's envelope plus *n* postings cloned round-robin from its samples."""
+        payload = self.load()
+        samples = self.postings(payload)
+        postings = []
+        for i in range(n):
+            clone = copy.deepcopy(samples[i % len(samples)])
+            self.rekey(clone, i)
+            postings.append(clone)
+        return payload, postings
+
+
+def _rekey_uuid(prefix: str) -> Callable[[dict, int], None]:
+    def rekey(j: dict, i: int) -> None:
+        old = j["id"]
+        j["id"] = f"{prefix}{i:012d}"
+        for k in ("jobUrl", "applyUrl", "hostedUrl"):
+            if k in j:
+                j[k] = j[k].replace(old, j["id"])
+    return rekey
+
+
+def _rekey_greenhouse(j: dict, i: int) -> None:
+    j["id"] = j["internal_job_id"] = 5_000_000 + i
+    j["absolute_url"] = re.sub(r"\d+$", str(j["id"]), j["absolute_url"])
+
+
+def _rekey_smartrecruiters(j: dict, i: int) -> None:
+    j["id"] = f"7440{i:09d}"
+
+
+def _rekey_workday(j: dict, i: int) -> None:
+    req = f"R{i:07d}"
+    j["bulletFields"] = [req]
+    j["externalPath"] = re.sub(r"_R\d+$", f"_{req}", j["externalPath"])
+
+
+FIXTURE_SET: Dict[str, Fixture] = {
+    f.ats: f for f in (
+        Fixture("Greenhouse", "greenhouse.json", "http://boards-api.greenhouse.io:{port}/v1/boards/{slug}/jobs",
+                "jobs", _rekey_greenhouse),
+        Fixture("Ashby", "ashby.json", "http://api.ashbyhq.com:{port}/posting-api/job-board/{slug}",
+                "jobs", _rekey_uuid("00000000-0000-4000-8000-")),
+        Fixture("Lever", "lever.json", "http://api.lever.co:{port}/v0/postings/{slug}",
+                None, _rekey_uuid("11111111-2222-4333-8444-")),
+        Fixture("SmartRecruiters", "smartrecruiters.json",
+                "http://api.smartrecruiters.com:{port}/v1/companies/{slug}/postings",
+                "content", _rekey_smartrecruiters, paged=True),
+        Fixture("Workday", "workday.json", "http://{slug}.wd5.myworkdayjobs.com:{port}/en-US/External",
+                "jobPostings", _rekey_workday, paged=True),
+    )
+}
+
+
+# ── stub server (runs in its own process) ──────────────────────────────
+def _stub_app(sizes: List[int], latency: float = 0.0) -> web.Application:
+    boards: Dict[Tuple[str, str], Tuple[Fixture, Any, List[dict], Optional[bytes]]] = {}
+    for fixture in FIXTURE_SET.values():
+        for n in sizes:
+            envelope, postings = fixture.expand(n)
+            body = None
+            if not fixture.paged:
+                if fixture.list_key is None:
+                    body = json.dumps(postings).encode()
+                else:
+                    body = json.dumps({**envelope, fixture.list_key: postings}).encode()
+            boards[(fixture.ats, f"acme{n}")] = (fixture, envelope, postings, body)
+
+    def page(ats: str, slug: str, offset: int, limit: int) -> web.Response:
+        fixture, envelope, postings, _ = boards[(ats, slug)]
+        payload = {**envelope, fixture.list_key: postings[offset:offset + limit]}
+        if ats == "SmartRecruiters":
+            payload.update(offset=offset, limit=limit, totalFound=len(postings))
+        else:
+            # like the real CXS API, only the first page carries the total
+            payload["total"] = len(postings) if offset == 0 else 0
+        return web.json_response(payload)
+
+    def full(ats: str):
+        async def handler(request: web.Request) -> web.Response:
+            return web.Response(body=boards[(ats, request.match_info["slug"])][3], content_type="application/json")
+        return handler
+
+    async def smartrecruiters(request: web.Request) -> web.Response:
+        q = request.query
+        return page("SmartRecruiters", request.match_info["slug"], int(q.get("offset", 0)), int(q.get("limit", 100)))
+
+    async def workday(request: web.Request) -> web.Response:
+        body = await request.json()
+        limit = int(body.get("limit") or body.get("pageSize") or 20)
+        offset = int(body["offset"]) if "offset" in body else (int(body.get("page", 1)) - 1) * limit
+        return page("Workday", request.match_info["slug"], offset, limit)
+
+    @web.middleware
+    async def round_trip(request: web.Request, handler):
+        await asyncio.sleep(latency)   # stands in for the network RTT to the real ATS
+        return await handler(request)
+
+    app = web.Application(middlewares=[round_trip] if latency else [])
+    app.router.add_get("/v1/boards/{slug}/jobs", full("Greenhouse"))
+    app.router.add_get("/posting-api/job-board/{slug}", full("Ashby"))
+    app.router.add_get("/v0/postings/{slug}", full("Lever"))
+    app.router.add_get("/v1/companies/{slug}/postings", smartrecruiters)
+    app.router.add_post("/wday/cxs/{slug}/{site}/jobs", workday)
+    return app
+
+
+def _serve(sizes: List[int], latency: float, ready) -> None:
+    async def run() -> None:
+        runner = web.AppRunner(_stub_app(sizes, latency), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        ready.send(site._server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+class _LoopbackResolver(AbstractResolver):
+    """Resolve every host to the stub."""
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[Dict[str, Any]]:
+        return [{
+            "hostname": host, "host": "127.0.0.1", "port": port,
+            "family": socket.AF_INET, "proto": 0, "flags": socket.AI_NUMERICHOST,
+        }]
+
+    async def close(self) -> None:
+        pass
+
+
+# ── measurement ────────────────────────────────────────────────────────
+async def _fetch(adapter, http: aiohttp.ClientSession, url: str) -> int:
+    return len(await adapter.fetch_jobs(http, "Acme", url, FetchState()))
+
+
+async def _timed(adapter, http: aiohttp.ClientSession, url: str) -> Tuple[int, float, float, float]:
+    """(jobs, seconds, max stall, total stall) of one fetch_jobs call."""
+    max_stall = total_stall = 0.0
+    stop = asyncio.Event()
+
+    async def ticker():
+        nonlocal max_stall, total_stall
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.001)
+            late = time.perf_counter() - t0 - 0.001
+            max_stall = max(max_stall, late)
+            total_stall += max(0.0, late)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    t0 = time.perf_counter()
+    n = await _fetch(adapter, http, url)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await tick
+    return n, elapsed, max_stall, total_stall
+
+
+async def bench_adapter(
+    http: aiohttp.ClientSession, fixture: Fixture, url: str, repeat: int, streaming: bool
+) -> dict:
+    # by module rather than ADAPTER_REGISTRY, so disabled adapters can be measured too
+    adapter_cls = getattr(importlib.import_module(f"src.crawler.adapters.{fixture.ats.lower()}"), f"{fixture.ats}Adapter")
+    adapter = adapter_cls(streaming=streaming)
+    await _fetch(adapter, http, url)   # warm the connection and the location-parser caches
+
+    runs = [await _timed(adapter, http, url) for _ in range(repeat)]
+    jobs = runs[0][0]
+    seconds = statistics.median(r[1] for r in runs)
+
+    tracemalloc.start()
+    try:
+        await _fetch(adapter, http, url)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "jobs": jobs,
+        "seconds": round(seconds, 4),
+        "jobs_per_sec": round(jobs / seconds, 1) if seconds else 0.0,
+        "peak_mib": round(peak / 2**20, 2),
+        "max_stall_ms": round(statistics.median(r[2] for r in runs) * 1000, 2),
+        "total_stall_ms": round(statistics.median(r[3] for r in runs) * 1000, 2),
+    }
+
+
+async def run_suite(
+    ats_names: List[str], sizes: List[int], repeat: int, streaming: bool, latency: float = 0.0
+) -> Dict[str, dict]:
+    ctx = multiprocessing.get_context("spawn")
+    ready, child_end = ctx.Pipe()
+    server = ctx.Process(target=_serve, args=(sizes, latency, child_end), daemon=True)
+    server.start()
+    try:
+        port = ready.recv()
+        results = {}
+        async with create_http_session(HttpStats(), resolver=_LoopbackResolver()) as http:
+            for ats in ats_names:
+                fixture = FIXTURE_SET[ats]
+                for n in sizes:
+                    url = fixture.url.format(port=port, slug=f"acme{n}")
+                    result = await bench_adapter(http, fixture, url, repeat, streaming)
+                    results[f"{ats}/{n}"] = result
+                    print(
+                        f"{ats:<16}{n:>7} jobs  {result['jobs_per_sec']:>10,.0f} jobs/s  "
+                        f"peak {result['peak_mib']:>7.2f} MiB  stall max {result['max_stall_ms']:>7.1f} ms "
+                        f"total {result['total_stall_ms']:>8.1f} ms"
+                    )
+        return results
+    finally:
+        server.terminate()
+        server.join()
+
+
+# ── baseline ───────────────────────────────────────────────────────────
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Human-readable regressions of *results* against *baseline*."""
+    regressions = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if res["jobs_per_sec"] < base["jobs_per_sec"] * (1 - tolerance):
+            regressions.append(f"{key}: {res['jobs_per_sec']:,.0f} jobs/s vs {base['jobs_per_sec']:,.0f}")
+        if res["peak_mib"] > base["peak_mib"] * (1 + tolerance):
+            regressions.append(f"{key}: peak {res['peak_mib']:.2f} MiB vs {base['peak_mib']:.2f}")
+        if res["max_stall_ms"] > max(base["max_stall_ms"] * (1 + tolerance), base["max_stall_ms"] + STALL_FLOOR_MS):
+            regressions.append(f"{key}: stall {res['max_stall_ms']:.1f} ms vs {base['max_stall_ms']:.1f}")
+    return regressions
+
+
+# ── recording ──────────────────────────────────────────────────────────
+async def record(ats: str, company: str, url: str, keep: int) -> Path:
+    """Fetch one live board and store its first *keep* postings, anonymized, as the fixture."""
+    fixture = FIXTURE_SET[ats]
+    async with create_http_session(HttpStats()) as http:
+        if ats == "Workday":
+            adapter_url = url.rstrip("/")
+            tenant = re.match(r"https://([^.]*)\.", adapter_url).group(1)
+            site = adapter_url.split("/")[-1]
+            origin = re.match(r"https://[^/]+", adapter_url).group(0)
+            async with http.post(
+                f"{origin}/wday/cxs/{tenant}/{site}/jobs",
+                json={"appliedFacets": {}, "limit": 20, "offset": 0, "searchText": ""},
+                headers={"Accept": "application/json"},
+            ) as resp:
+                resp.raise_for_status()
+                payload = await resp.json()
+        else:
+            async with http.get(url, headers={"Accept": "application/json"}) as resp:
+                resp.raise_for_status()
+                payload = await resp.json()
+
+    slug = url.rstrip("/").split("/")[-1] if ats != "Workday" else tenant
+    names = sorted({company, slug, company.lower(), company.replace(" ", "")}, key=len, reverse=True)
+    pattern = re.compile("|".join(re.escape(n) for n in names if n), re.IGNORECASE)
+
+    def scrub(obj: Any) -> Any:
+        if isinstance(obj, str):
+            return pattern.sub(lambda m: "Acme" if m.group(0)[0].isupper() else "acme", obj)
+        if isinstance(obj, list):
+            return [scrub(v) for v in obj]
+        if isinstance(obj, dict):
+            return {k: scrub(v) for k, v in obj.items()}
+        return obj
+
+    postings = fixture.postings(payload)[:keep]
+    for i, posting in enumerate(postings):
+        fixture.rekey(posting, i)
+    if fixture.list_key is None:
+        payload = postings
+    else:
+        payload = {**payload, fixture.list_key: postings}
+    path = FIXTURES / fixture.file
+    path.write_text(json.dumps(scrub(payload), indent=1))
+    return path
+
+
+def main(args: argparse.Namespace) -> int:
+    if args.record:
+        print(f"wrote {asyncio.run(record(args.record, args.company or 'Acme', args.url, args.keep))}")
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    results = asyncio.run(run_suite(
+        args.ats or list(FIXTURE_SET), sizes, args.repeat, args.streaming, args.latency_ms / 1000
+    ))
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(json.dumps(results, indent=2, sort_keys=True))
+        print(f"baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"no regressions beyond {args.tolerance:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ats", action="append", choices=list(FIXTURE_SET), help="repeatable; default all")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated board sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated round trip per request")
+    parser.add_argument("--streaming", action=argparse.BooleanOptionalAction,
+                        default=load_config().parsing.streaming, help="default: parsing.streaming in crawler.yaml")
+    parser.add_argument("--save-baseline", type=Path, metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", type=Path, metavar="PATH", help="baseline from an earlier --save-baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--record", choices=list(FIXTURE_SET), help="refresh this ATS's fixture from a live board")
+    parser.add_argument("--company", help="with --record: name to scrub from the payload")
+    parser.add_argument("--keep", type=int, default=8, help="with --record: postings to keep")
+    parser.add_argument("url", nargs="?", help="with --record: live feed URL")
+    args = parser.parse_args()
+    if args.compare and not args.compare.is_file():
+        parser.error(f"--compare: no baseline at {args.compare} (save one with --save-baseline first)")
+    sys.exit(main(args))
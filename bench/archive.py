@@ -0,0 +1,165 @@
+"""
+Hot-table queries before and after archiving closed postings to jobs_archive.
+
+    DATABASE_URL=... python -m bench.archive [--feeds 50] [--active 400] [--ratio 10]
+
+Needs a Postgres (DATABASE_URL, as for the crawler); works in a scratch
+schema that is dropped afterwards. Every board gets --active open postings
+among --ratio times as many rows ever seen, the closed ones last touched 90
+days ago and interleaved with the open ones, as a table grown by months of
+crawls ends up. The queries a run sends against `jobs` are timed, the
+closed rows are archived with archive_closed_jobs (checked to move exactly
+those), and the same queries are timed again. Each query runs --repeat times in a rolled-back savepoint.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from src.crawler.db import get_engine
+from src.crawler.db_utils import archive_closed_jobs, deactivate_missing, load_known_jobs
+from src.crawler.models import JobArchive, JobRecord
+
+SCHEMA = "bench_archive"
+BATCH = 5000
+
+Query = Callable[[AsyncSession], Awaitable[None]]
+
+_POPULATE = text("""
+INSERT INTO jobs (external_id, company, source_feed, title, job_url,
+                  is_active, posted_at, job_updated_at, updated_at)
+SELECT i::text, 'Company' || f, 'Greenhouse', 'Software Engineer', 'https://example.com/' || f || '/' || i,
+       i % :ratio = 0, now(), now(),
+       CASE WHEN i % :ratio = 0 THEN now() ELSE now() - interval '90 days' END
+FROM generate_series(0, :rows - 1) i, generate_series(0, :feeds - 1) f
+""")
+
+
+async def _vacuum(engine: AsyncEngine) -> None:
+    """VACUUM ANALYZE both tables – what autovacuum would get to after a real archive pass."""
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        await conn.execute(text("VACUUM ANALYZE jobs"))
+        await conn.execute(text("VACUUM ANALYZE jobs_archive"))
+
+
+def _queries(feeds: int, active: int, ratio: int) -> Dict[str, Query]:
+    """What a crawl run and the notifier send against `jobs`, keyed by a label."""
+    every_feed = [(f"Company{f}", "Greenhouse") for f in range(feeds)]
+    seen = [str(i) for i in range(0, active * ratio, ratio)]
+    rnd = random.Random(7)
+
+    async def known_jobs(session: AsyncSession) -> None:
+        await load_known_jobs(every_feed, session)
+
+    async def deactivate(session: AsyncSession) -> None:
+        await deactivate_missing("Company0", "Greenhouse", seen, session)
+
+    async def notifier(session: AsyncSession) -> None:
+        # the open ids of a few boards, as a queue drained every 15 minutes holds
+        ids = (await session.execute(
+            select(JobRecord.id).where(JobRecord.is_active.is_(True)).limit(5000)
+        )).scalars().all()
+        sample = rnd.sample(ids, min(500, len(ids)))
+        (await session.execute(select(JobRecord).where(JobRecord.id.in_(sample)))).scalars().all()
+
+    async def open_count(session: AsyncSession) -> None:
+        await session.execute(text("SELECT company, count(*) FROM jobs WHERE is_active GROUP BY company"))
+
+    return {
+        "load_known_jobs": known_jobs,
+        "deactivate_missing": deactivate,
+        "notifier lookup": notifier,
+        "open per company": open_count,
+    }
+
+
+async def _time(conn: AsyncConnection, query: Query, repeat: int) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        # the session's savepoint is rolled back when it closes
+        async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint") as session:
+            t0 = time.perf_counter()
+            await query(session)
+            times.append(time.perf_counter() - t0)
+    return times
+
+
+async def _measure(conn: AsyncConnection, queries: Dict[str, Query], repeat: int) -> Dict[str, float]:
+    trans = await conn.begin()
+    try:
+        return {name: statistics.median(await _time(conn, q, repeat)) for name, q in queries.items()}
+    finally:
+        await trans.rollback()
+
+
+async def main(feeds: int, active: int, ratio: int, repeat: int) -> None:
+    engine = get_engine()
+    queries = _queries(feeds, active, ratio)
+    async with engine.connect() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        # unqualified `jobs` now resolves to the scratch table on this connection
+        await conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        await conn.run_sync(lambda sync: JobRecord.metadata.create_all(
+            sync, tables=[JobRecord.__table__, JobArchive.__table__],
+        ))
+        await conn.execute(_POPULATE, {"rows": active * ratio, "ratio": ratio, "feeds": feeds})
+        await conn.commit()
+        try:
+            await _vacuum(engine)
+            total = (await conn.execute(text("SELECT count(*) FROM jobs"))).scalar_one()
+            await conn.commit()
+            print(f"{feeds} feeds x {active} open postings, {total} rows in jobs")
+            before = await _measure(conn, queries, repeat)
+
+            cutoff = datetime.now(timezone.utc) - timedelta(days=30)
+            t0 = time.perf_counter()
+            moved = batches = 0
+            while True:
+                async with AsyncSession(bind=conn) as session:
+                    batch = await archive_closed_jobs(cutoff, BATCH, session)
+                    await session.commit()
+                moved += batch
+                batches += 1
+                if batch < BATCH:
+                    break
+            archive_s = time.perf_counter() - t0
+            # every closed row moved, every open one stayed
+            left, still_open = (await conn.execute(text(
+                "SELECT count(*), count(*) FILTER (WHERE is_active) FROM jobs"
+            ))).one()
+            archived = (await conn.execute(text("SELECT count(*) FROM jobs_archive"))).scalar_one()
+            await conn.commit()
+            assert moved == archived == total - feeds * active, (moved, archived, total)
+            assert left == still_open == feeds * active, (left, still_open)
+            print(f"archived {moved} rows in {batches} batches of {BATCH}: {archive_s:.1f}s "
+                  f"({moved / archive_s:.0f} rows/s)")
+
+            await _vacuum(engine)
+            after = await _measure(conn, queries, repeat)
+        finally:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.commit()
+    await engine.dispose()
+
+    print(f"{'query':<20}{'before ms':>12}{'after ms':>12}{'speed-up':>10}")
+    for name in queries:
+        print(f"{name:<20}{before[name] * 1000:>12.1f}{after[name] * 1000:>12.1f}{before[name] / after[name]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--feeds", type=int, default=50)
+    parser.add_argument("--active", type=int, default=400, help="open postings per board")
+    parser.add_argument("--ratio", type=int, default=10, help="rows ever seen per open posting")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.feeds, args.active, args.ratio, args.repeat))
@@ -0,0 +1,132 @@
+"""
+Feed deactivation: NOT IN (<every seen id>) vs the unnest() anti-join.
+
+    DATABASE_URL=... python -m bench.deactivate [--jobs 10000] [--feeds 10] [--missing 0.02]
+
+Needs a Postgres (DATABASE_URL, as for the crawler). Everything happens in
+a scratch schema that is dropped afterwards: --feeds boards of --jobs
+postings each, then one board is re-crawled with --missing of its
+postings gone. deactivate_missing is first checked to close exactly those;
+then each strategy runs --repeat times inside a rolled-back transaction and
+the best and median times are reported.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from src.crawler.db import get_engine
+from src.crawler.db_utils import deactivate_missing
+from src.crawler.models import JobRecord
+
+SCHEMA = "bench_deactivate"
+
+
+async def not_in(company: str, source_feed: str, seen_ids: List[str], session: AsyncSession) -> None:
+    """The query deactivate_missing used to send."""
+    await session.execute(
+        update(JobRecord)
+        .where(
+            JobRecord.company == company,
+            JobRecord.source_feed == source_feed,
+            JobRecord.external_id.not_in(seen_ids),
+        )
+        .values(is_active=False)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _populate(conn: AsyncConnection, feeds: int, jobs: int) -> None:
+    await conn.run_sync(lambda sync: JobRecord.metadata.create_all(sync, tables=[JobRecord.__table__]))
+    now = datetime.now(timezone.utc)
+    for f in range(feeds):
+        rows = [
+            {
+                "external_id": str(i), "company": f"Company{f}", "source_feed": "Greenhouse",
+                "title": "Software Engineer", "job_url": f"https://example.com/{f}/{i}",
+                # a closed tail, as real boards accumulate
+                "is_active": i < jobs * 0.9, "posted_at": now, "job_updated_at": now,
+            }
+            for i in range(jobs)
+        ]
+        for i in range(0, len(rows), 5000):
+            await conn.execute(JobRecord.__table__.insert(), rows[i:i + 5000])
+    await conn.execute(text("ANALYZE jobs"))
+
+
+async def _time(conn: AsyncConnection, strategy, seen_ids: List[str], repeat: int) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        # the session's savepoint is rolled back when it closes
+        async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint") as session:
+            t0 = time.perf_counter()
+            await strategy("Company0", "Greenhouse", seen_ids, session)
+            times.append(time.perf_counter() - t0)
+    return times
+
+
+async def _check(conn: AsyncConnection, seen_ids: List[str], active: int) -> None:
+    """deactivate_missing closes exactly the active postings the re-crawl left out, on that board only."""
+    async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint") as session:
+        closed = await deactivate_missing("Company0", "Greenhouse", seen_ids, session)
+        assert closed == active - len(seen_ids), (closed, active - len(seen_ids))
+        still_open = (await session.execute(text(
+            "SELECT count(*) FROM jobs WHERE company = 'Company0' AND is_active"
+        ))).scalar_one()
+        assert still_open == len(seen_ids), (still_open, len(seen_ids))
+        others = (await session.execute(text(
+            "SELECT count(*) FROM jobs WHERE company <> 'Company0' AND is_active"
+        ))).scalar_one()
+        assert others % active == 0, others
+
+
+async def main(feeds: int, jobs: int, missing: float, repeat: int) -> None:
+    engine = get_engine()
+    async with engine.connect() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        # unqualified `jobs` now resolves to the scratch table on this connection
+        await conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        await conn.commit()
+        try:
+            await _populate(conn, feeds, jobs)
+            await conn.commit()
+
+            # the re-crawl lists every active posting except every step-th one
+            active = int(jobs * 0.9)
+            step = round(1 / missing) if missing else 0
+            seen = [str(i) for i in range(active) if not step or i % step]
+            print(f"{feeds} feeds x {jobs} jobs, re-crawl lists {len(seen)} of {active} active postings")
+
+            trans = await conn.begin()
+            try:
+                await _check(conn, seen, active)
+                rows = [
+                    ("NOT IN", await _time(conn, not_in, seen, repeat)),
+                    ("unnest anti-join", await _time(conn, deactivate_missing, seen, repeat)),
+                ]
+            finally:
+                await trans.rollback()
+        finally:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.commit()
+    await engine.dispose()
+
+    print(f"{'strategy':<18}{'best ms':>10}{'median ms':>12}")
+    for name, times in rows:
+        print(f"{name:<18}{min(times) * 1000:>10.1f}{statistics.median(times) * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--feeds", type=int, default=10)
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--missing", type=float, default=0.02, help="fraction of active postings gone")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.feeds, args.jobs, args.missing, args.repeat))
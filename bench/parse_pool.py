@@ -0,0 +1,92 @@
+"""
+Inline vs process-pool parsing of Greenhouse payloads.
+
+    python -m bench.parse_pool [--boards 16] [--jobs 2000] [--workers N]
+
+Parses every board concurrently, as a crawl run would, and reports wall
+time, throughput and the longest event-loop stall seen by a 1 ms ticker –
+the stall is what every other in-flight feed waits on.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List
+
+from src.crawler.adapters.greenhouse import parse_greenhouse_payload
+from src.crawler.parse_pool import create_parse_pool, parse_payload
+
+LOCATIONS = [
+    "San Francisco, CA", "New York, NY", "Remote - US", "London, United Kingdom",
+    "Toronto, Ontario, Canada", "Bangalore, India", "Remote", "Seattle, WA; Austin, TX",
+    "Berlin, Germany", "Dublin, Ireland", "Hybrid - Chicago, IL", "Singapore",
+]
+
+
+def greenhouse_board(n_jobs: int, seed: int) -> bytes:
+    rnd = random.Random(seed)
+    jobs = [
+        {
+            "id": seed * 1_000_000 + i,
+            "title": f"Software Engineer {rnd.randint(1, 4)}",
+            "first_published": "2025-06-01T09:30:00-04:00",
+            "updated_at": f"2025-07-{rnd.randint(10, 28)}T12:00:00-04:00",
+            "location": {"name": rnd.choice(LOCATIONS)},
+            "absolute_url": f"https://boards.greenhouse.io/acme/jobs/{seed}{i}",
+            "metadata": None,
+            "requisition_id": f"R{rnd.randint(10000, 99999)}",
+        }
+        for i in range(n_jobs)
+    ]
+    return json.dumps({"jobs": jobs, "meta": {"total": n_jobs}}).encode()
+
+
+async def _run(boards: List[bytes], pool) -> dict:
+    stall = 0.0
+    stop = asyncio.Event()
+
+    async def ticker():
+        nonlocal stall
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stall = max(stall, time.perf_counter() - t0 - 0.001)
+
+    tick = asyncio.create_task(ticker())
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(
+        parse_payload(parse_greenhouse_payload, f"Board{i}", body, pool) for i, body in enumerate(boards)
+    ))
+    wall = time.perf_counter() - t0
+    stop.set()
+    await tick
+    n_jobs = sum(len(r) for r in results)
+    return {"wall": wall, "jobs": n_jobs, "stall": stall}
+
+
+async def main(boards: int, jobs: int, workers) -> None:
+    payloads = [greenhouse_board(jobs, seed) for seed in range(boards)]
+    mb = sum(len(p) for p in payloads) / 1e6
+    print(f"{boards} boards x {jobs} jobs ({mb:.1f} MB)")
+
+    pool = create_parse_pool(workers)
+    try:
+        # spawn + import cost is paid once per run, keep it out of the numbers
+        await _run(payloads[:1], pool)
+        rows = [("inline", await _run(payloads, None)), ("process pool", await _run(payloads, pool))]
+    finally:
+        pool.shutdown()
+
+    print(f"{'mode':<14}{'wall s':>8}{'jobs/s':>10}{'max loop stall ms':>20}")
+    for name, r in rows:
+        print(f"{name:<14}{r['wall']:>8.2f}{r['jobs'] / r['wall']:>10.0f}{r['stall'] * 1000:>20.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--boards", type=int, default=16)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.boards, args.jobs, args.workers))
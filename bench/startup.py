@@ -0,0 +1,103 @@
+"""
+Worker start-up cost: import time and companies registry load.
+
+    python -m bench.startup [--budget-ms 800] [--runs 5] [--top 10]
+
+Imports the worker in fresh interpreters under `-X importtime` and reports
+the median cumulative import time plus the heaviest top-level packages,
+then times loading companies.yaml cold (YAML parse + validation) against
+the compiled registry cache. Exits 1 when the import median is over
+budget or a package kept off the start-up path (LAZY) was imported, so it
+can run as a CI gate.
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Tuple
+
+from src.crawler.feed_registry import COMPANIES_YAML, load_companies
+
+# "import time:  self [us] | cumulative | imported package"
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+# imported where first used (db / db_utils call sites, registry rebuilds),
+# never by importing the worker
+LAZY = ("sqlalchemy", "yaml")
+
+
+def import_profile(module: str) -> Tuple[float, Counter]:
+    """Cumulative import time of *module* (ms) and the time spent in each package it pulls in."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    rows = [
+        (len(m.group(3)), m.group(4), int(m.group(2)) / 1000)
+        for m in map(_LINE.match, out.splitlines()) if m
+    ]
+    total = next((ms for depth, name, ms in rows if name == module), 0.0)
+
+    # children are printed before their parent: walk backwards so every
+    # package is counted once, at its outermost import
+    packages, stack = Counter(), []
+    for depth, name, ms in reversed(rows):
+        root = name.split(".")[0]
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        if root != "src" and all(r != root for _, r in stack):
+            packages[root] += ms
+        stack.append((depth, root))
+    return total, packages
+
+
+def registry_load_ms(runs: int) -> Tuple[float, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = Path(tmp) / "companies.registry"
+        cold = []
+        for _ in range(runs):
+            cache.unlink(missing_ok=True)
+            t0 = time.perf_counter()
+            load_companies(COMPANIES_YAML, cache)
+            cold.append(time.perf_counter() - t0)
+        warm = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            load_companies(COMPANIES_YAML, cache)
+            warm.append(time.perf_counter() - t0)
+    return statistics.median(cold) * 1000, statistics.median(warm) * 1000
+
+
+def main(budget_ms: float, runs: int, top: int) -> int:
+    profiles = [import_profile("src.crawler.worker") for _ in range(runs)]
+    median = statistics.median(total for total, _ in profiles)
+    print(f"import src.crawler.worker: {median:.0f} ms median of {runs} (budget {budget_ms:.0f} ms)")
+    for name, ms in profiles[-1][1].most_common(top):
+        print(f"  {name:<24} {ms:7.1f} ms")
+
+    cold, warm = registry_load_ms(runs)
+    print(f"companies registry: {cold:.1f} ms parsed, {warm:.2f} ms cached")
+
+    status = 0
+    eager = [name for name in LAZY if name in profiles[-1][1]]
+    if eager:
+        print(f"IMPORTED EAGERLY: {', '.join(eager)}")
+        status = 1
+    if median > budget_ms:
+        print(f"OVER BUDGET by {median - budget_ms:.0f} ms")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=800)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    sys.exit(main(args.budget_ms, args.runs, args.top))
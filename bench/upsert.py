@@ -0,0 +1,165 @@
+"""
+Job upserts: chunked multi-row INSERT ... VALUES vs COPY into a staging table.
+
+    DATABASE_URL=... python -m bench.upsert [--feeds 8] [--jobs 5000] [--changed 0.1]
+
+Needs a Postgres (DATABASE_URL, as for the crawler); works in a scratch
+schema that is dropped afterwards. Each strategy writes --feeds boards of
+--jobs postings as one writer batch twice: into an empty table (all
+inserts), then again with --changed of the postings edited (the VALUES
+path sends every row into ON CONFLICT; the merge drops unchanged ones
+before its INSERT). The COPY path's change counts and alert queue are
+checked first. Every round runs in its own rolled-back transaction. The
+staged path also queues the alerts; the VALUES path leaves that out, so
+its numbers flatter it.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import func, or_, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from src.crawler.db import get_engine
+from src.crawler.db_utils import bulk_upsert_jobs, store_descriptions
+from src.crawler.models import JobDescription, JobRecord
+from src.crawler.schemas import Job
+from src.notifications.models import JobAlertQueue
+
+SCHEMA = "bench_upsert"
+VALUES_CHUNK = 1000   # rows per statement, as the VALUES path used – 17 columns each
+
+
+async def values_upsert(jobs: List[Job], session: AsyncSession) -> None:
+    """The chunked INSERT ... VALUES bulk_upsert_jobs used to send."""
+    await store_descriptions(jobs, session)
+    rows = [
+        {
+            "external_id": job.external_id, "company": job.company, "source_feed": job.source_feed,
+            "title": job.title, "department": job.department, "team": job.team,
+            "employment_type": job.employment_type, "countries": job.countries, "cities": job.cities,
+            "is_remote": job.is_remote, "job_url": job.job_url, "apply_url": job.apply_url,
+            "description_hash": job.description_hash(), "posted_at": job.posted_at, "job_updated_at": job.job_updated_at,
+            "content_hash": job.content_hash(), "is_active": True,
+        }
+        for job in jobs
+    ]
+    for i in range(0, len(rows), VALUES_CHUNK):
+        stmt = insert(JobRecord).values(rows[i:i + VALUES_CHUNK])
+        update = {c: stmt.excluded[c] for c in rows[0] if c not in ("external_id", "company", "source_feed")}
+        await session.execute(stmt.on_conflict_do_update(
+            constraint="uq_job_key",
+            set_={**update, "updated_at": func.now()},
+            where=or_(
+                JobRecord.content_hash.is_distinct_from(stmt.excluded.content_hash),
+                JobRecord.is_active.is_not(True),
+            ),
+        ))
+
+
+def make_jobs(feeds: int, jobs: int) -> List[Job]:
+    rnd = random.Random(7)
+    now = datetime.now(timezone.utc)
+    return [
+        Job(
+            company=f"Company{f}", external_id=str(i), source_feed="Greenhouse",
+            title=f"Software Engineer {rnd.randint(1, 4)}", job_updated_at=now, posted_at=now,
+            department="Engineering", countries=["United States"], cities=["San Francisco", "New York"],
+            job_url=f"https://boards.greenhouse.io/company{f}/jobs/{i}",
+            description="<p>" + "We are hiring. " * rnd.randint(50, 200) + "</p>",
+        )
+        for f in range(feeds)
+        for i in range(jobs)
+    ]
+
+
+async def _check(conn: AsyncConnection, first: List[Job], second: List[Job]) -> None:
+    """
+    The merge's bookkeeping, on a rolled-back savepoint: every posting
+    counts as inserted once, a re-upsert reports only the edited ones, an
+    identical pass reports nothing, and the alert queue holds one entry per
+    job however often it changed.
+    """
+    edited = sum(a is not b for a, b in zip(first, second))
+    async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint") as session:
+        changes = await bulk_upsert_jobs(first, session)
+        assert sum(i for _, i in changes.values()) == len(first), changes
+        changes = await bulk_upsert_jobs(second, session)
+        assert sum(c for c, _ in changes.values()) == edited and not any(i for _, i in changes.values()), changes
+        assert await bulk_upsert_jobs(second, session) == {}
+        queued = (await session.execute(text("SELECT count(*), count(DISTINCT job_id) FROM job_alert_queue"))).one()
+        assert tuple(queued) == (len(first), len(first)), queued
+        stored = (await session.execute(text("SELECT count(*) FROM job_descriptions"))).scalar_one()
+        assert stored == len({job.description_hash() for job in first}), stored
+
+
+async def _round(conn: AsyncConnection, strategy, first: List[Job], second: List[Job]) -> List[float]:
+    """(insert seconds, re-upsert seconds) in a transaction that is rolled back afterwards."""
+    trans = await conn.begin()
+    try:
+        async with AsyncSession(bind=conn) as session:
+            t0 = time.perf_counter()
+            await strategy(first, session)
+            t1 = time.perf_counter()
+            await strategy(second, session)
+            t2 = time.perf_counter()
+        return [t1 - t0, t2 - t1]
+    finally:
+        await trans.rollback()
+
+
+async def main(feeds: int, jobs: int, changed: float, repeat: int) -> None:
+    first = make_jobs(feeds, jobs)
+    step = round(1 / changed) if changed else 0
+    second = [
+        replace(job, title=job.title + " (Senior)") if step and i % step == 0 else job
+        for i, job in enumerate(first)
+    ]
+    print(f"{feeds} feeds x {jobs} jobs, {sum(a is not b for a, b in zip(first, second))} edited on the second pass")
+
+    engine = get_engine()
+    results = {}
+    async with engine.connect() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        # unqualified `jobs` now resolves to the scratch table on this connection
+        await conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        await conn.run_sync(lambda sync: JobRecord.metadata.create_all(
+            sync, tables=[JobRecord.__table__, JobDescription.__table__, JobAlertQueue.__table__],
+        ))
+        await conn.commit()
+        try:
+            trans = await conn.begin()
+            try:
+                await _check(conn, first, second)
+            finally:
+                await trans.rollback()
+            for name, strategy in (("VALUES", values_upsert), ("COPY + merge", bulk_upsert_jobs)):
+                await _round(conn, strategy, first[:100], second[:100])   # warm-up
+                results[name] = [await _round(conn, strategy, first, second) for _ in range(repeat)]
+        finally:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.commit()
+    await engine.dispose()
+
+    print(f"{'strategy':<14}{'insert ms':>12}{'re-upsert ms':>15}{'rows/s':>10}")
+    for name, rounds in results.items():
+        insert_s = statistics.median(r[0] for r in rounds)
+        again_s = statistics.median(r[1] for r in rounds)
+        print(f"{name:<14}{insert_s * 1000:>12.0f}{again_s * 1000:>15.0f}{len(first) / insert_s:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--feeds", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--changed", type=float, default=0.1, help="fraction of postings edited between passes")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.feeds, args.jobs, args.changed, args.repeat))
@@ -1,15 +1,33 @@
-from typing import Dict, Type
+import importlib
+from typing import Dict, Iterator, Mapping, Type
 from src.crawler.adapters.base import Adapter
-from src.crawler.adapters.greenhouse import GreenhouseAdapter
-from src.crawler.adapters.ashby import AshbyAdapter
-from src.crawler.adapters.lever import LeverAdapter
-from src.crawler.adapters.workday import WorkdayAdapter
-from src.crawler.adapters.smartrecruiters import SmartRecruitersAdapter
-
-ADAPTER_REGISTRY:Dict[str, Type[Adapter]] = {
-    "Greenhouse":GreenhouseAdapter,
-    "Ashby":AshbyAdapter,
-    "Lever":LeverAdapter,
-    "SmartRecruiters":SmartRecruitersAdapter,
-    # "Workday":WorkdayAdapter
-}
\ No newline at end of file
+
+
+class _LazyRegistry(Mapping[str, Type[Adapter]]):
+    """ATS name -> adapter class, importing each adapter module on first lookup."""
+
+    def __init__(self, paths: Dict[str, str]):
+        self._paths = paths
+        self._loaded: Dict[str, Type[Adapter]] = {}
+
+    def __getitem__(self, ats: str) -> Type[Adapter]:
+        if ats not in self._loaded:
+            module, _, name = self._paths[ats].partition(":")
+            self._loaded[ats] = getattr(importlib.import_module(module), name)
+        return self._loaded[ats]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+
+ADAPTER_REGISTRY: Mapping[str, Type[Adapter]] = _LazyRegistry({
+    "Greenhouse": "src.crawler.adapters.greenhouse:GreenhouseAdapter",
+    "Ashby": "src.crawler.adapters.ashby:AshbyAdapter",
+    "Lever": "src.crawler.adapters.lever:LeverAdapter",
+    "SmartRecruiters": "src.crawler.adapters.smartrecruiters:SmartRecruitersAdapter",
+    "Workday": "src.crawler.adapters.workday:WorkdayAdapter",
+    "Custom": "src.crawler.adapters.custom:CustomAdapter",
+})
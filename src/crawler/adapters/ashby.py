@@ -1,9 +1,13 @@
+import json
 import logging
 from datetime import datetime,timezone
-from typing import List
+from typing import AsyncIterator, List, Optional
 import aiohttp
+from src.crawler import metrics
 from src.crawler.adapters.base import Adapter
-from src.crawler.schemas import Job
+from src.crawler.schemas import FetchState, Job
+from src.crawler.http_client import fetch_conditional, stream_conditional
+from src.crawler.parse_pool import parse_payload
 from src.crawler.location_parsers.ashby import parse_ashby_location
 
 
@@ -11,45 +15,68 @@ logger = logging.getLogger("Ashby")
 ISO_FMT = "%Y-%m-%dT%H:%M:%S.%f%z"
 
 class AshbyAdapter(Adapter):
-    async def fetch_jobs(self, company: str, url: str) -> List[Job]:    
-        endpoint = url.rstrip("/")
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=20)
-        ) as session:
-            async with session.get(endpoint, headers={"Accept": "application/json"}) as resp:
-                resp.raise_for_status()
-                payload = await resp.json()
-
-        jobs: List[Job] = []
-        for j in payload.get("jobs", []):
-
-            posted_at  = datetime.strptime(j["publishedAt"], ISO_FMT).astimezone(timezone.utc)
-            updated_at = datetime.strptime(j["publishedAt"], ISO_FMT).astimezone(timezone.utc)
-
-            # Parse location for Ashby using the new parser
-            cities, countries, is_remote = parse_ashby_location(j)
-
-            jobs.append(
-                Job(
-                    company       = company,
-                    external_id   = str(j["id"]),
-                    source_feed   = "Ashby",
-                    department    = j["department"],
-                    team          = j["team"],
-                    employment_type = j["employmentType"],
-                    title         = j["title"],
-
-                    countries     = countries,
-                    cities        = cities,
-                    is_remote     = is_remote,
-
-                    job_url       = j["jobUrl"],
-                    apply_url     = j["applyUrl"],
-
-                    posted_at     = posted_at,
-                    job_updated_at= updated_at,
-                )
-            )
+    async def fetch_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        company: str,
+        url: str,
+        state: Optional[FetchState] = None,
+    ) -> List[Job]:
+        if self.streaming:
+            jobs = [job async for job in self.iter_jobs(session, company, url, state)]
+        else:
+            endpoint = url.rstrip("/")
+            body = await fetch_conditional(session, endpoint, state)
+            jobs = await parse_payload(parse_ashby_payload, company, body, self.parse_pool)
 
         logger.info("%s / %d jobs", company, len(jobs))
         return jobs
+
+    async def iter_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        company: str,
+        url: str,
+        state: Optional[FetchState] = None,
+    ) -> AsyncIterator[Job]:
+        """Yield jobs as each entry of the `jobs` array finishes downloading."""
+        async for j in stream_conditional(session, url.rstrip("/"), state, "jobs"):
+            with metrics.stage("parse"):
+                job = _to_job(company, j)
+            yield job
+
+
+def parse_ashby_payload(company: str, body: bytes) -> List[Job]:
+    """Raw Ashby board JSON → jobs. Pure, so it can run in the parse pool."""
+    with metrics.stage("decode"):
+        payload = json.loads(body)
+    with metrics.stage("parse"):
+        return [_to_job(company, j) for j in payload.get("jobs", [])]
+
+
+def _to_job(company: str, j: dict) -> Job:
+    posted_at  = datetime.strptime(j["publishedAt"], ISO_FMT).astimezone(timezone.utc)
+    updated_at = datetime.strptime(j["publishedAt"], ISO_FMT).astimezone(timezone.utc)
+
+    # Parse location for Ashby using the new parser
+    cities, countries, is_remote = parse_ashby_location(j)
+
+    return Job(
+        company       = company,
+        external_id   = str(j["id"]),
+        source_feed   = "Ashby",
+        department    = j["department"],
+        team          = j["team"],
+        employment_type = j["employmentType"],
+        title         = j["title"],
+
+        countries     = countries,
+        cities        = cities,
+        is_remote     = is_remote,
+
+        job_url       = j["jobUrl"],
+        apply_url     = j["applyUrl"],
+
+        posted_at     = posted_at,
+        job_updated_at= updated_at,
+    )
@@ -1,10 +1,120 @@
+import asyncio
+import weakref
 from abc import ABC, abstractmethod
-from typing import List
-from src.crawler.schemas import Job
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+import aiohttp
+
+from src.crawler.schemas import FetchState, Job
+
+if TYPE_CHECKING:
+    from src.crawler.custom.artifacts import ArtifactStore
+
+K = TypeVar("K")
+T = TypeVar("T")
 
 
 class Adapter(ABC):
+    # Paged adapters that can stop early set this. When the worker sets
+    # state.incremental they page newest-first and stop at the first page
+    # whose postings are all in state.known_jobs with unchanged timestamps,
+    # flagging state.partial so the writer skips deactivation.
+    incremental = False
+    # Feeds that carry no posting timestamps set this to get state.known_jobs
+    # on every crawl, so a stored posting keeps its date instead of reading
+    # as changed (and re-alerting) each time.
+    reuses_known = False
+
+    def __init__(
+        self,
+        streaming: bool = False,
+        parse_pool: Optional[Executor] = None,
+        artifacts: Optional["ArtifactStore"] = None,
+    ):
+        # Adapters that can decode their payload incrementally do so when
+        # `streaming` is set; those with a pure bytes -> jobs parser hand it to
+        # `parse_pool` when one is given. Either flag is ignored where unsupported.
+        # Custom (non-ATS) crawlers get their browser-captured sessions from
+        # `artifacts`.
+        self.streaming = streaming
+        self.parse_pool = parse_pool
+        self.artifacts = artifacts
+
+    @classmethod
+    def handles(cls, url: str) -> bool:
+        """Whether this adapter can crawl *url*; the worker drops other feeds when loading companies.yaml."""
+        return True
+
     @abstractmethod
-    async def fetch_jobs(self, company: str,url:str) -> List[Job]:
+    async def fetch_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        company: str,
+        url: str,
+        state: Optional[FetchState] = None,
+    ) -> List[Job]:
+        """
+        Fetch one feed over the caller's run-scoped session (never close it here).
+
+        Adapters that support conditional requests use *state* for
+        If-None-Match / If-Modified-Since and raise FeedUnchanged when the feed
+        has not moved; others may ignore it and always fetch.
+        """
         ...
 
+
+def wants_known_jobs(adapter_cls: type) -> bool:
+    return getattr(adapter_cls, "incremental", False) or getattr(adapter_cls, "reuses_known", False)
+
+
+def page_is_known(jobs: List[Job], known: Optional[Dict[str, datetime]]) -> bool:
+    """True when every job on a page is already stored with the same timestamp."""
+    if not jobs or not known:
+        return False
+    return all(known.get(job.external_id) == job.job_updated_at for job in jobs)
+
+
+# host -> page slots, per shared session (so per event loop)
+_page_slots: "weakref.WeakKeyDictionary[aiohttp.ClientSession, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def page_slot(session: aiohttp.ClientSession, host: str, limit: int) -> asyncio.Semaphore:
+    """Caps the pages in flight to one host across every feed on it (the first caller's limit wins)."""
+    slots = _page_slots.setdefault(session, {})
+    if host not in slots:
+        slots[host] = asyncio.Semaphore(limit)
+    return slots[host]
+
+
+async def fetch_pages(fetch_page: Callable[[K], Awaitable[T]], keys: Iterable[K]) -> List[T]:
+    """
+    Fetch the pages for *keys* at once (the caller's page_slot bounds how many
+    are in flight) and return them in *keys* order. A missing page would read
+    as closed postings, so one failure fails the whole feed: the other pages
+    are cancelled and the error re-raised.
+    """
+    tasks = [asyncio.ensure_future(fetch_page(key)) for key in keys]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+def first_sightings(pages: Iterable[Iterable[Optional[Job]]]) -> List[Job]:
+    """
+    The jobs of *pages*, in page order, once per posting id. Postings shift
+    between pages when a board changes mid-crawl, so an id can show up twice
+    – the first sighting wins. None entries (rows that didn't parse) are skipped.
+    """
+    jobs: Dict[str, Job] = {}
+    for page in pages:
+        for job in page:
+            if job is not None and job.external_id not in jobs:
+                jobs[job.external_id] = job
+    return list(jobs.values())
@@ -0,0 +1,38 @@
+from typing import List, Mapping, Optional, Type
+from urllib.parse import urlparse
+
+import aiohttp
+
+from src.crawler.adapters import _LazyRegistry
+from src.crawler.adapters.base import Adapter
+from src.crawler.schemas import FetchState, Job
+
+# careers-site host -> its hand-written crawler
+SITE_REGISTRY: Mapping[str, Type[Adapter]] = _LazyRegistry({
+    "www.metacareers.com": "src.crawler.adapters.meta:MetaAdapter",
+    "www.uber.com": "src.crawler.adapters.uber:UberAdapter",
+})
+
+
+class CustomAdapter(Adapter):
+    """Feeds with ats "Custom": one crawler per careers site, picked by the feed URL's host."""
+
+    # custom sites rarely expose posting dates
+    reuses_known = True
+
+    @classmethod
+    def handles(cls, url: str) -> bool:
+        return urlparse(url).netloc in SITE_REGISTRY
+
+    async def fetch_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        company: str,
+        url: str,
+        state: Optional[FetchState] = None,
+    ) -> List[Job]:
+        host = urlparse(url).netloc
+        if host not in SITE_REGISTRY:
+            raise ValueError(f"no custom crawler for {host}")
+        site = SITE_REGISTRY[host](streaming=self.streaming, parse_pool=self.parse_pool, artifacts=self.artifacts)
+        return await site.fetch_jobs(session, company, url, state)
@@ -1,9 +1,12 @@
 from datetime import datetime, timezone
-from typing import List
-import aiohttp, logging
+from typing import AsyncIterator, List, Optional
+import aiohttp, json, logging
 
+from src.crawler import metrics
 from src.crawler.adapters.base import Adapter
-from src.crawler.schemas import Job
+from src.crawler.schemas import FetchState, Job
+from src.crawler.http_client import fetch_conditional, stream_conditional
+from src.crawler.parse_pool import parse_payload
 from src.crawler.location_parsers.greenhouse import parse_greenhouse_location
 
 logger = logging.getLogger("Greenhouse")
@@ -11,42 +14,65 @@ ISO_FMT = "%Y-%m-%dT%H:%M:%S%z"
 
 class GreenhouseAdapter(Adapter):
 
-    async def fetch_jobs(self, company: str, url: str) -> List[Job]:
-        endpoint = url.rstrip("/")         
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=20)
-        ) as session:
-            async with session.get(endpoint, headers={"Accept": "application/json"}) as resp:
-                resp.raise_for_status()
-                payload = await resp.json()
+    async def fetch_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        company: str,
+        url: str,
+        state: Optional[FetchState] = None,
+    ) -> List[Job]:
+        if self.streaming:
+            jobs = [job async for job in self.iter_jobs(session, company, url, state)]
+        else:
+            endpoint = url.rstrip("/")
+            body = await fetch_conditional(session, endpoint, state)
+            jobs = await parse_payload(parse_greenhouse_payload, company, body, self.parse_pool)
 
-        jobs: List[Job] = []
-        for j in payload.get("jobs", []):
+        logger.info("%s – %d jobs", company, len(jobs))
+        return jobs
 
-            posted_at  = datetime.strptime(j["first_published"], ISO_FMT).astimezone(timezone.utc)
-            updated_at = datetime.strptime(j["updated_at"],      ISO_FMT).astimezone(timezone.utc)
+    async def iter_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        company: str,
+        url: str,
+        state: Optional[FetchState] = None,
+    ) -> AsyncIterator[Job]:
+        """Yield jobs as each entry of the `jobs` array finishes downloading."""
+        async for j in stream_conditional(session, url.rstrip("/"), state, "jobs"):
+            with metrics.stage("parse"):
+                job = _to_job(company, j)
+            yield job
 
-            cities, countries, is_remote = parse_greenhouse_location(j["location"]["name"])
 
-            jobs.append(
-                Job(
-                    company       = company,
-                    external_id   = str(j["id"]),
-                    source_feed   = "Greenhouse",
+def parse_greenhouse_payload(company: str, body: bytes) -> List[Job]:
+    """Raw Greenhouse board JSON → jobs. Pure, so it can run in the parse pool."""
+    with metrics.stage("decode"):
+        payload = json.loads(body)
+    with metrics.stage("parse"):
+        return [_to_job(company, j) for j in payload.get("jobs", [])]
 
-                    title         = j["title"],
 
-                    countries     = countries,
-                    cities        = cities,
-                    is_remote     = is_remote,
+def _to_job(company: str, j: dict) -> Job:
+    posted_at  = datetime.strptime(j["first_published"], ISO_FMT).astimezone(timezone.utc)
+    updated_at = datetime.strptime(j["updated_at"],      ISO_FMT).astimezone(timezone.utc)
 
-                    job_url       = j["absolute_url"],
-                    apply_url     = j["absolute_url"],
+    cities, countries, is_remote = parse_greenhouse_location(j["location"]["name"])
 
-                    posted_at     = posted_at,
-                    job_updated_at= updated_at,
-                )
-            )
+    return Job(
+        company       = company,
+        external_id   = str(j["id"]),
+        source_feed   = "Greenhouse",
 
-        logger.info("%s – %d jobs", company, len(jobs))
-        return jobs
+        title         = j["title"],
+
+        countries     = countries,
+        cities        = cities,
+        is_remote     = is_remote,
+
+        job_url       = j["absolute_url"],
+        apply_url     = j["absolute_url"],
+
+        posted_at     = posted_at,
+        job_updated_at= updated_at,
+    )
@@ -1,9 +1,13 @@
+import json
 import logging
-from typing import List
+from typing import List, Optional
 import aiohttp
 from datetime import datetime, timezone
+from src.crawler import metrics
 from src.crawler.adapters.base import Adapter
-from src.crawler.schemas import Job
+from src.crawler.schemas import FetchState, Job
+from src.crawler.http_client import fetch_conditional
+from src.crawler.parse_pool import parse_payload
 from src.crawler.location_parsers.lever import parse_lever_location
 
 
@@ -11,23 +15,35 @@ logger = logging.getLogger("Lever")
 
 class LeverAdapter(Adapter):
     
-    async def fetch_jobs(self, company: str, url: str) -> List[Job]:
+    async def fetch_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        company: str,
+        url: str,
+        state: Optional[FetchState] = None,
+    ) -> List[Job]:
         endpoint = url.rstrip("/")
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=20)
-        ) as session:
-            async with session.get(endpoint, headers={"Accept": "application/json"}) as resp:
-                resp.raise_for_status()
-                payload = await resp.json()
+        body = await fetch_conditional(session, endpoint, state)
+        jobs = await parse_payload(parse_lever_payload, company, body, self.parse_pool)
 
-        jobs: List[Job] = []
+        logger.info("%s / %d jobs", company, len(jobs))
+        return jobs
+
+
+def parse_lever_payload(company: str, body: bytes) -> List[Job]:
+    """Raw Lever postings JSON → jobs. Pure, so it can run in the parse pool."""
+    with metrics.stage("decode"):
+        payload = json.loads(body)
 
+    jobs: List[Job] = []
+
+    with metrics.stage("parse"):
         for j in payload:
             posted_at = datetime.fromtimestamp(j["createdAt"]/1000, tz=timezone.utc)
-            
+        
             # Parse location using the Lever location parser
             cities, countries, is_remote = parse_lever_location(j)
-            
+        
             jobs.append(Job(
                 company       = company,
                 external_id   = str(j["id"]),
@@ -41,5 +57,4 @@ class LeverAdapter(Adapter):
                 posted_at     = posted_at,
                 job_updated_at= posted_at,
             ))
-        logger.info("%s / %d jobs", company, len(jobs))
-        return jobs
\ No newline at end of file
+    return jobs
@@ -0,0 +1,111 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from src.crawler import metrics
+from src.crawler.adapters.base import Adapter
+from src.crawler.custom import meta
+from src.crawler.location_parsers.greenhouse import parse_greenhouse_location
+from src.crawler.schemas import FetchState, Job
+
+logger = logging.getLogger("Meta")
+
+JOB_URL = "https://www.metacareers.com/jobs/{id}/"
+MAX_PAGES = 400   # guard against a cursor that never runs out (400 x 25 postings)
+
+
+class MetaAdapter(Adapter):
+    """
+    metacareers.com job search over its GraphQL endpoint.
+
+    The session (cookies, form tokens, doc_id) comes from the shared
+    ArtifactStore; the pages themselves are plain POSTs on the run's pooled
+    aiohttp session, following the cursor until the search runs out.
+    """
+
+    # search results carry no dates – stored postings keep theirs
+    reuses_known = True
+
+    async def fetch_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        company: str,
+        url: str,
+        state: Optional[FetchState] = None,
+    ) -> List[Job]:
+        if self.artifacts is None:
+            raise RuntimeError("Meta crawler needs an ArtifactStore for its session")
+        known = state.known_jobs if state is not None else None
+        now = datetime.now(timezone.utc)
+
+        jobs: Dict[str, Job] = {}
+        cursor: Optional[str] = None
+        pages = 0
+        while True:
+            postings, cursor = await self.artifacts.call(
+                meta.ARTIFACTS, meta.capture_session, meta.ARTIFACT_TTL,
+                lambda artifacts: meta.fetch_search_page(session, artifacts, cursor),
+            )
+            pages += 1
+            with metrics.stage("parse"):
+                for p in postings:
+                    job = _to_job(company, p, known, now)
+                    # results shift while we page – first sighting wins
+                    if job is not None and job.external_id not in jobs:
+                        jobs[job.external_id] = job
+            if not cursor or not postings:
+                break
+            if pages >= MAX_PAGES:
+                # postings past the guard were never seen: don't close them
+                logger.warning("%s – stopped after %d pages, cursor still open", company, pages)
+                if state is not None:
+                    state.partial = True
+                break
+
+        logger.info("%s – %d jobs (%d pages)", company, len(jobs), pages)
+        return list(jobs.values())
+
+
+def _to_job(
+    company: str, p: dict, known: Optional[Dict[str, datetime]], now: datetime
+) -> Optional[Job]:
+    job_id = p.get("id")
+    title = (p.get("title") or "").strip()
+    if job_id in (None, "") or not title:
+        return None
+    job_id = str(job_id)
+
+    # one string per office; a "Remote, US" entry must not hide the others
+    cities: List[str] = []
+    countries: List[str] = []
+    is_remote = False
+    for loc in p.get("locations") or []:
+        if not isinstance(loc, str):
+            continue
+        loc_cities, loc_countries, loc_remote = parse_greenhouse_location(loc)
+        cities += [c for c in loc_cities if c not in cities]
+        countries += [c for c in loc_countries if c not in countries]
+        is_remote = is_remote or loc_remote
+    teams = p.get("teams") or []
+    sub_teams = p.get("sub_teams") or []
+
+    # first sighting stands in for the posting date
+    seen_at = (known or {}).get(job_id) or now
+    job_url = JOB_URL.format(id=job_id)
+    return Job(
+        company=company,
+        external_id=job_id,
+        source_feed="Custom",
+        title=title,
+        department=teams[0] if teams else None,
+        team=sub_teams[0] if sub_teams else None,
+        countries=countries,
+        cities=cities,
+        is_remote=is_remote,
+        job_url=job_url,
+        apply_url=job_url,
+        posted_at=seen_at,
+        job_updated_at=seen_at,
+    )
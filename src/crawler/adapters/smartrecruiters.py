@@ -1,83 +1,112 @@
 import logging
-import asyncio
-from typing import List
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
 import aiohttp
-from src.crawler.adapters.base import Adapter
-from src.crawler.schemas import Job
+from src.crawler import metrics
+from src.crawler.adapters.base import Adapter, fetch_pages, first_sightings, page_is_known, page_slot
+from src.crawler.http_client import wait_turn
+from src.crawler.schemas import FetchState, Job
 from datetime import datetime, timezone
 
 logger = logging.getLogger("SmartRecruiters")
 
-class SmartRecruitersAdapter(Adapter):
+PAGE_SIZE = 100
+PAGE_CONCURRENCY = 4    # pages in flight to api.smartrecruiters.com, across all feeds
+
 
-    async def fetch_jobs(self, company: str, url: str) -> List[Job]:
+class SmartRecruitersAdapter(Adapter):
+    # postings come back newest first, so an incremental crawl can stop at
+    # the first page that holds nothing new
+    incremental = True
+
+    async def fetch_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        company: str,
+        url: str,
+        state: Optional[FetchState] = None,   # paged feed – known_jobs lets it stop early
+    ) -> List[Job]:
         endpoint = url.rstrip("/")
-        offset = 0
-        limit = 100
-        jobs: List[Job] = []
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=20)
-        ) as session:
-            while True:
-                paginated_url = f"{endpoint}?offset={offset}&limit={limit}"
-                async with session.get(paginated_url, headers={"Accept": "application/json"}) as resp:
-                    resp.raise_for_status()
-                    data= await resp.json()
-
-
-                    for j in data.get("content", []):
-                        try:
-                            date_str = j["releasedDate"]
-                            if date_str.endswith('Z'):
-                                date_str = date_str[:-1] + '+00:00'
-                            posted_at = datetime.fromisoformat(date_str).astimezone(timezone.utc)
-
-                            # Handle location data safely
-                            location = j.get("location", {})
-                            country = location.get("country") if location else None
-                            city = location.get("city") if location else None
-                            is_remote = location.get("remote", False) if location else False
-
-                            jobs.append(
-                            Job(
-                                company       = company,
-                                external_id   = str(j["id"]),
-                                source_feed   = "SmartRecruiters",
-
-                                title         = j["name"],
-
-                                countries     = [country] if country else [],
-                                cities        = [city] if city else [],
-                                is_remote     = is_remote,
-
-                                job_url       = "No URL, check the job page",
-                                apply_url     = "No URL, check the job page",
-
-                                posted_at     = posted_at,
-                                job_updated_at= posted_at,
-                            )
-                            )
-                        except Exception as e:
-                            logger.error(f"Error processing job {j.get('id', 'unknown')}: {e}")
-                            continue
-
-                if len(data.get("content", [])) < limit:
-                    break
-
-                offset += limit
-
-        logger.info("%s – %d jobs", company, len(jobs))
+        slot = page_slot(session, urlparse(endpoint).netloc, PAGE_CONCURRENCY)
+        known = state.known_jobs if state is not None else None
+
+        async def fetch_page(offset: int) -> Tuple[int, int, List[Job]]:
+            async with slot:
+                return await self._fetch_page(session, company, endpoint, offset)
+
+        total, n_raw, first = await fetch_page(0)
+        pages = [first]
+        offset = PAGE_SIZE
+
+        if state is not None and state.incremental:
+            if n_raw == PAGE_SIZE and page_is_known(first, known):
+                state.partial = True
+        elif n_raw == PAGE_SIZE and total > PAGE_SIZE:
+            # full sweep: totalFound gives every offset up front
+            offsets = range(PAGE_SIZE, total, PAGE_SIZE)
+            for _, n_raw, page_jobs in await fetch_pages(fetch_page, offsets):
+                pages.append(page_jobs)
+            offset = offsets[-1] + PAGE_SIZE
+
+        # Sequential tail: the whole incremental crawl, or – after a fan-out –
+        # whatever was posted while we were reading. Stops at a short page.
+        while n_raw == PAGE_SIZE and not (state is not None and state.partial):
+            _, n_raw, page_jobs = await fetch_page(offset)
+            pages.append(page_jobs)
+            if state is not None and state.incremental and n_raw == PAGE_SIZE and page_is_known(page_jobs, known):
+                state.partial = True
+            offset += PAGE_SIZE
+
+        jobs = first_sightings(pages)
+        logger.info("%s – %d jobs%s", company, len(jobs), " (incremental)" if state and state.partial else "")
         return jobs
 
-
-
-
-
-
-
-
-
-
-# if __name__ == "__main__":
-#     adapter = SmartRecruitersAdapter()
-#     asyncio.run(adapter.fetch_jobs("ServiceNow", "https://api.smartrecruiters.com/v1/companies/servicenow/postings"))
\ No newline at end of file
+    async def _fetch_page(
+        self, session: aiohttp.ClientSession, company: str, endpoint: str, offset: int
+    ) -> Tuple[int, int, List[Job]]:
+        """(totalFound, postings on the page, the ones that parsed)."""
+        paginated_url = f"{endpoint}?offset={offset}&limit={PAGE_SIZE}"
+        await wait_turn(session, paginated_url)
+        async with session.get(paginated_url, headers={"Accept": "application/json"}) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+
+        content = data.get("content", [])
+        with metrics.stage("parse"):
+            page_jobs = [job for job in (_to_job(company, j) for j in content) if job is not None]
+        return data.get("totalFound") or 0, len(content), page_jobs
+
+
+def _to_job(company: str, j: dict) -> Optional[Job]:
+    try:
+        date_str = j["releasedDate"]
+        if date_str.endswith('Z'):
+            date_str = date_str[:-1] + '+00:00'
+        posted_at = datetime.fromisoformat(date_str).astimezone(timezone.utc)
+
+        # Handle location data safely
+        location = j.get("location", {})
+        country = location.get("country") if location else None
+        city = location.get("city") if location else None
+        is_remote = location.get("remote", False) if location else False
+
+        return Job(
+            company       = company,
+            external_id   = str(j["id"]),
+            source_feed   = "SmartRecruiters",
+
+            title         = j["name"],
+
+            countries     = [country] if country else [],
+            cities        = [city] if city else [],
+            is_remote     = is_remote,
+
+            job_url       = "No URL, check the job page",
+            apply_url     = "No URL, check the job page",
+
+            posted_at     = posted_at,
+            job_updated_at= posted_at,
+        )
+    except Exception as e:
+        logger.error(f"Error processing job {j.get('id', 'unknown')}: {e}")
+        return None
@@ -0,0 +1,151 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from src.crawler import metrics
+from src.crawler.adapters.base import Adapter, fetch_pages, first_sightings, page_slot
+from src.crawler.custom import uber
+from src.crawler.schemas import FetchState, Job
+
+logger = logging.getLogger("Uber")
+
+JOB_URL = "https://www.uber.com/global/en/careers/list/{id}/"
+PAGE_CONCURRENCY = 4    # pages in flight on www.uber.com
+MAX_PAGES = 200         # guard against a bogus total
+
+
+class UberAdapter(Adapter):
+    """
+    uber.com careers list, read from its Next.js data route
+    (/_next/data/<buildId>/us/en/careers/list.json?page=N) – no browser.
+
+    The buildId and cookies come from the shared ArtifactStore; Chromium is
+    only started when they are missing, expired, or rejected (a deploy
+    rotates the buildId and the old route answers 404).
+    """
+
+    # list entries without dates keep the stored ones
+    reuses_known = True
+
+    async def fetch_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        company: str,
+        url: str,
+        state: Optional[FetchState] = None,
+    ) -> List[Job]:
+        if self.artifacts is None:
+            raise RuntimeError("Uber crawler needs an ArtifactStore for its buildId")
+        known = state.known_jobs if state is not None else None
+        now = datetime.now(timezone.utc)
+        slot = page_slot(session, "www.uber.com", PAGE_CONCURRENCY)
+
+        async def fetch_page(page: int) -> Tuple[Optional[int], int, List[Job]]:
+            """(reported total, entries on the page, the ones that parsed)."""
+            async with slot:
+                props = await self.artifacts.call(
+                    uber.ARTIFACTS, uber.capture_session, uber.ARTIFACT_TTL,
+                    lambda artifacts: uber.fetch_page_props(session, artifacts, page),
+                )
+            entries = props.get("jobs") or []
+            with metrics.stage("parse"):
+                page_jobs = [job for job in (_to_job(company, e, known, now) for e in entries) if job is not None]
+            return _total(props), len(entries), page_jobs
+
+        total, page_size, first = await fetch_page(1)
+        pages = [first]
+        truncated = False
+        if page_size and total and total > page_size:
+            # the first page gives the page count – fetch the rest at once
+            page_count = -(-total // page_size)
+            truncated = page_count > MAX_PAGES
+            rest = await fetch_pages(fetch_page, range(2, min(page_count, MAX_PAGES) + 1))
+            pages += [page_jobs for _, _, page_jobs in rest]
+        elif page_size and total is None:
+            # no total reported: walk on until a short page
+            for n in range(2, MAX_PAGES + 1):
+                _, n_raw, page_jobs = await fetch_page(n)
+                pages.append(page_jobs)
+                if n_raw < page_size:
+                    break
+            else:
+                truncated = True
+
+        if truncated:
+            # postings past the guard were never seen: don't close them
+            logger.warning("%s – stopped after %d pages (total=%s)", company, MAX_PAGES, total)
+            if state is not None:
+                state.partial = True
+
+        jobs = first_sightings(pages)
+        logger.info("%s – %d jobs (%d pages, total=%s)", company, len(jobs), len(pages), total)
+        return jobs
+
+
+def _total(props: dict) -> Optional[int]:
+    for key in ("totalResults", "total", "totalCount"):
+        value = props.get(key)
+        if isinstance(value, dict):   # {"low": n, "high": 0} from the Long-encoded API
+            value = value.get("low")
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def _to_job(
+    company: str, e: dict, known: Optional[Dict[str, datetime]], now: datetime
+) -> Optional[Job]:
+    job_id = e.get("id")
+    title = (e.get("title") or "").strip()
+    if job_id in (None, "") or not title:
+        return None
+    job_id = str(job_id)
+
+    # remote roles are listed with "Remote" where the city (or region) goes,
+    # e.g. {"city": "Remote", "countryName": "United States"}
+    cities: List[str] = []
+    countries: List[str] = []
+    is_remote = False
+    for loc in e.get("allLocations") or [e.get("location") or {}]:
+        city, country = loc.get("city"), loc.get("countryName") or loc.get("country")
+        if any("remote" in (loc.get(key) or "").lower() for key in ("city", "region")):
+            is_remote = True
+            city = None
+        if city and city not in cities:
+            cities.append(city)
+        if country and country not in countries:
+            countries.append(country)
+
+    updated_at = _parse_ts(e.get("updatedDate")) or (known or {}).get(job_id) or now
+    posted_at = _parse_ts(e.get("creationDate")) or updated_at
+    job_url = JOB_URL.format(id=job_id)
+    return Job(
+        company=company,
+        external_id=job_id,
+        source_feed="Custom",
+        title=title,
+        department=e.get("department") or None,
+        team=e.get("team") or None,
+        employment_type=e.get("timeType") or None,
+        countries=countries,
+        cities=cities,
+        is_remote=is_remote,
+        job_url=job_url,
+        apply_url=job_url,
+        description=e.get("description") or None,
+        posted_at=posted_at,
+        job_updated_at=updated_at,
+    )
+
+
+def _parse_ts(raw: Optional[str]) -> Optional[datetime]:
+    """ISO 8601 as the list gives it ("2025-06-28T14:09:23.000Z"); None if absent or unreadable."""
+    if not raw:
+        return None
+    try:
+        ts = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return ts.astimezone(timezone.utc) if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
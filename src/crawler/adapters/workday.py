@@ -1,130 +1,194 @@
 import re, aiohttp, logging
 from datetime import datetime, timezone
-from typing import List
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
-from src.crawler.adapters.base import Adapter
-from src.crawler.schemas import Job
+from src.crawler import metrics
+from src.crawler.adapters.base import Adapter, fetch_pages, first_sightings, page_is_known, page_slot
+from src.crawler.http_client import wait_turn
+from src.crawler.schemas import FetchState, Job
 
 logger = logging.getLogger("Workday")
 ISO_TS = "%Y-%m-%dT%H:%M:%S%z"          # 2025-06-28T14:09:23Z
 ISO_TS_MS = "%Y-%m-%dT%H:%M:%S.%f%z"    # 2025-06-28T14:09:23.456Z
 
 
+# Pages of one tenant are fetched concurrently once the first page has
+# reported `total`; the tenant host's rate limit (scheduler.hosts /
+# default_host) still applies to every request.
+PAGE_SIZE = 20          # the CXS list API rejects larger pages on many tenants
+PAGE_CONCURRENCY = 4    # pages in flight per tenant host
+MAX_PAGES = 500         # guard against a bogus `total`
+
+# {tenant}.wd{n}.myworkdayjobs.com – careers sites merely built on Workday
+# (amazon.jobs, careers.bankofamerica.com, ...) expose no CXS API
+TENANT_HOST = re.compile(r"([^.]*)\.wd\d+\.")
+
+
 class WorkdayAdapter(Adapter):
-    # ─────────────────────────────────────────────────────────
-    async def fetch_jobs(self, company: str, url: str) -> List[Job]:
-        if self._is_legacy_url(url):
-            return await self._fetch_legacy_jobs(company, url)
-        return await self._fetch_new_jobs(company, url)   # (to-do)
+    # the list endpoint returns the most recently posted first
+    incremental = True
+
+    @classmethod
+    def handles(cls, url: str) -> bool:
+        return TENANT_HOST.match(urlparse(url).netloc) is not None
 
-    def _is_legacy_url(self, url: str) -> bool:
-        return "/wday/cxs/" in url or "graph" not in url.lower()
+    # ─────────────────────────────────────────────────────────
+    async def fetch_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        company: str,
+        url: str,
+        state: Optional[FetchState] = None,   # paged feed – known_jobs lets it stop early
+    ) -> List[Job]:
+        return await self._fetch_legacy_jobs(session, company, url, state)
 
     # ─────────────────────────────────────────────────────────
-    async def _fetch_legacy_jobs(self, company: str, landing_url: str) -> List[Job]:
+    async def _fetch_legacy_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        company: str,
+        landing_url: str,
+        state: Optional[FetchState] = None,
+    ) -> List[Job]:
         """
         1. Derive the real list endpoint:
            https://{tenant}.{dc}.myworkdayjobs.com/wday/cxs/{tenant}/{site}/jobs
-        2. POST page=1..N, pageSize=50
-        3. Map each entry in `jobPostings` → Job  (no extra detail call)
+        2. POST offset=0 and read `total` (only the first page reports it)
+        3. Incremental crawl: POST the next offsets one by one, stopping at
+           the first page with nothing new. Full sweep: POST all remaining
+           offsets concurrently, at most PAGE_CONCURRENCY per tenant, and
+           reassemble them in offset order
+        4. Map each entry in `jobPostings` → Job  (no extra detail call),
+           keeping the first sighting of every posting id
         """
-        tenant, dc = re.match(r"https://([^.]*)\.(wd\d)\.", landing_url).groups()
+        landing    = urlparse(landing_url)
+        match      = TENANT_HOST.match(landing.netloc)
+        if match is None:
+            raise ValueError(f"not a myworkdayjobs.com tenant URL: {landing_url}")
+        tenant     = match.group(1)
         site_slug  = landing_url.rstrip("/").split("/")[-1]
 
-        list_url   = (
-            f"https://{tenant}.{dc}.myworkdayjobs.com/"
-            f"wday/cxs/{tenant}/{site_slug}/jobs"
-        )
-
-        jobs: List[Job] = []
-        page, page_size = 1, 50
-
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30)
-        ) as session:
-            while True:
-                body = {
-                    "appliedFacets": {},
-                    "searchText": "",
-                    "searchRequest": {"searchText": ""},
-                    "page": page,
-                    "pageSize": page_size,
-                }
+        origin     = f"{landing.scheme}://{landing.netloc}"
+        list_url   = f"{origin}/wday/cxs/{tenant}/{site_slug}/jobs"
+        headers    = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Origin": origin,
+            "Referer": landing_url,
+        }
+        slot  = page_slot(session, landing.netloc, PAGE_CONCURRENCY)
+        known = state.known_jobs if state is not None else None
+
+        async def fetch_page(offset: int) -> Tuple[int, List[Job]]:
+            """(reported total, parsed jobs) – parsing per page keeps each loop hold short."""
+            body = {"appliedFacets": {}, "limit": PAGE_SIZE, "offset": offset, "searchText": ""}
+            async with slot:
+                await wait_turn(session, list_url)
                 async with session.post(
-                    list_url,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                        "Origin": f"https://{tenant}.{dc}.myworkdayjobs.com",
-                        "Referer": landing_url,
-                    },
-                    json=body,
+                    list_url, headers=headers, json=body, timeout=aiohttp.ClientTimeout(total=30),
                 ) as resp:
                     resp.raise_for_status()
                     payload = await resp.json()
-
-                postings = payload.get("jobPostings", [])
-                if not postings:
-                    break  # no more pages
-
-                for p in postings:
-                    # Workday’s list JSON wraps the actual data in "jobPosting"
-                    jp = p.get("jobPosting", p)  # some tenants flatten
-                    job_id = (
-                        jp.get("jobPostingId")
-                        or next(iter(jp.get("bulletFields", [])), None)
-                    )
-                    if not job_id:  # skip malformed rows
-                        continue
-
-                    title = jp.get("title", "").strip()
-
-                    # posted date parsing
-                    raw_posted = jp.get("postedOn") or jp.get("startDate") or ""
-                    posted_at = _parse_ts(raw_posted)
-
-                    # URL (externalPath starts with '/job/...')
-                    ext_path = jp.get("externalPath") or f"/job/{job_id}"
-                    job_url  = f"https://{tenant}.{dc}.myworkdayjobs.com{ext_path}"
-
-                    # locations: if Workday gives "locationsText" only, keep it in cities
-                    loc_text = jp.get("locationsText", "")
-                    cities   = [loc_text] if loc_text else []
-                    countries = []
-                    is_remote = "remote" in loc_text.lower()
-
-                    jobs.append(
-                        Job(
-                            company=company,
-                            external_id=str(job_id),
-                            source_feed="Workday",
-                            title=title,
-                            countries=countries,
-                            cities=cities,
-                            is_remote=is_remote,
-                            job_url=job_url,
-                            apply_url=job_url,
-                            posted_at=posted_at,
-                            job_updated_at=posted_at,
-                        )
-                    )
-
-                page += 1  
-
-        logger.info("%s – %d legacy jobs", company, len(jobs))
+            with metrics.stage("parse"):
+                page_jobs = [_to_job(company, origin, p, known) for p in payload.get("jobPostings", [])]
+            return payload.get("total") or 0, page_jobs
+
+        total, first = await fetch_page(0)
+        pages = [first]
+        last  = min(total, MAX_PAGES * PAGE_SIZE) if total else MAX_PAGES * PAGE_SIZE
+        # postings past the guard are never read: don't close them
+        truncated = total > MAX_PAGES * PAGE_SIZE
+
+        if state is not None and state.incremental:
+            for offset in range(PAGE_SIZE, last, PAGE_SIZE):
+                if len(pages[-1]) < PAGE_SIZE:
+                    break
+                if page_is_known([job for job in pages[-1] if job is not None], known):
+                    state.partial = True
+                    break
+                pages.append((await fetch_page(offset))[1])
+        elif total > PAGE_SIZE:
+            rest = await fetch_pages(fetch_page, range(PAGE_SIZE, last, PAGE_SIZE))
+            pages += [page_jobs for _, page_jobs in rest]
+        elif not total and len(first) == PAGE_SIZE:
+            # no total reported: walk on until a short page
+            for offset in range(PAGE_SIZE, MAX_PAGES * PAGE_SIZE, PAGE_SIZE):
+                _, page_jobs = await fetch_page(offset)
+                pages.append(page_jobs)
+                if len(page_jobs) < PAGE_SIZE:
+                    break
+            else:
+                truncated = True
+
+        if truncated:
+            logger.warning("%s – stopped after %d pages (total=%d)", company, MAX_PAGES, total)
+            if state is not None:
+                state.partial = True
+
+        jobs = first_sightings(pages)
+        logger.info(
+            "%s – %d legacy jobs (%d pages, total=%d%s)",
+            company, len(jobs), len(pages), total, ", partial" if state and state.partial else "",
+        )
         return jobs
 
 
+def _to_job(
+    company: str, origin: str, p: dict, known: Optional[Dict[str, datetime]] = None
+) -> Optional[Job]:
+    # Workday’s list JSON wraps the actual data in "jobPosting"
+    jp = p.get("jobPosting", p)  # some tenants flatten
+    job_id = (
+        jp.get("jobPostingId")
+        or next(iter(jp.get("bulletFields", [])), None)
+    )
+    if not job_id:  # skip malformed rows
+        return None
+
+    title = jp.get("title", "").strip()
+
+    # posted date parsing – list pages mostly say "Posted 3 Days Ago", so a
+    # posting we already store keeps its timestamp instead of drifting to now()
+    raw_posted = jp.get("postedOn") or jp.get("startDate") or ""
+    posted_at = _parse_ts(raw_posted, default=(known or {}).get(str(job_id)))
+
+    # URL (externalPath starts with '/job/...')
+    ext_path = jp.get("externalPath") or f"/job/{job_id}"
+    job_url  = f"{origin}{ext_path}"
+
+    # locations: if Workday gives "locationsText" only, keep it in cities
+    loc_text = jp.get("locationsText", "")
+    cities   = [loc_text] if loc_text else []
+    countries = []
+    is_remote = "remote" in loc_text.lower()
+
+    return Job(
+        company=company,
+        external_id=str(job_id),
+        source_feed="Workday",
+        title=title,
+        countries=countries,
+        cities=cities,
+        is_remote=is_remote,
+        job_url=job_url,
+        apply_url=job_url,
+        posted_at=posted_at,
+        job_updated_at=posted_at,
+    )
+
+
 # ─────────── ts helper ───────────
-def _parse_ts(raw: str) -> datetime:
+def _parse_ts(raw: str, default: Optional[datetime] = None) -> datetime:
     """
     Workday list feed gives:
         • ISO with Z     2025-06-28T14:09:23Z
         • ISO with ms    2025-06-28T14:09:23.456Z
-        • Friendly text  "Posted Today" / "Posted Yesterday" – fallback to now()
+        • Friendly text  "Posted Today" / "Posted Yesterday" – fallback to
+          *default*, else now()
     """
     if not raw:
-        return datetime.now(timezone.utc)
+        return default or datetime.now(timezone.utc)
 
     iso = raw.replace("Z", "+00:00")
     for fmt in (ISO_TS_MS, ISO_TS):
@@ -132,4 +196,4 @@ def _parse_ts(raw: str) -> datetime:
             return datetime.strptime(iso, fmt).astimezone(timezone.utc)
         except ValueError:
             continue
-    return datetime.now(timezone.utc)
+    return default or datetime.now(timezone.utc)
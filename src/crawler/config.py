@@ -0,0 +1,174 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.crawler.feed_registry import load_compiled_yaml
+
+CONFIG_YAML = Path(__file__).with_name("crawler.yaml")
+# beside companies.registry; yaml is only imported when crawler.yaml changed
+CONFIG_CACHE = Path(__file__).with_name("__pycache__") / "crawler.config"
+
+
+@dataclass(frozen=True)
+class Limit:
+    concurrency: Optional[int] = None   # None = no cap at this level
+    rate: Optional[float] = None        # requests / second, None = unthrottled
+    burst: Optional[int] = None         # bucket size, defaults to max(1, rate)
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "Limit":
+        raw = raw or {}
+        return cls(
+            concurrency=raw.get("concurrency"),
+            rate=raw.get("rate"),
+            burst=raw.get("burst"),
+        )
+
+
+@dataclass(frozen=True)
+class SchedulerConfig:
+    fetch_concurrency: int = 24
+    db_concurrency: int = 4
+    default_host: Limit = Limit(concurrency=4, rate=5, burst=10)
+    hosts: Dict[str, Limit] = field(default_factory=dict)
+    ats: Dict[str, Limit] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "SchedulerConfig":
+        raw = raw or {}
+        defaults = cls()
+        return cls(
+            fetch_concurrency=raw.get("fetch_concurrency", defaults.fetch_concurrency),
+            db_concurrency=raw.get("db_concurrency", defaults.db_concurrency),
+            default_host=(
+                Limit.from_dict(raw["default_host"]) if "default_host" in raw else defaults.default_host
+            ),
+            hosts={h: Limit.from_dict(v) for h, v in (raw.get("hosts") or {}).items()},
+            ats={a: Limit.from_dict(v) for a, v in (raw.get("ats") or {}).items()},
+        )
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    writers: int = 2
+    queue_size: int = 16              # parsed feeds waiting for a writer
+    max_feeds_per_batch: int = 8      # feeds merged into one transaction
+    max_jobs_per_batch: int = 5000
+    linger: float = 0.05              # seconds a writer waits for more feeds to coalesce
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "PipelineConfig":
+        raw = raw or {}
+        return cls(**{k: raw[k] for k in cls.__dataclass_fields__ if k in raw})
+
+
+@dataclass(frozen=True)
+class PollingConfig:
+    min_interval: int = 15 * 60       # seconds – never poll faster than the cron
+    max_interval: int = 24 * 60 * 60  # dormant boards are still checked daily
+    backoff: float = 2.0              # interval multiplier per unchanged crawl
+    busy_change_rate: float = 0.5     # at/above this, interval is capped at 2 x min
+    alpha: float = 0.3                # EWMA weight of the latest crawl in change_rate
+    due_slack: int = 120              # seconds early a feed may run (cron jitter)
+    incremental: bool = True          # paged feeds stop at the first page with nothing new...
+    full_sweep_interval: int = 6 * 60 * 60   # ...but read every page this often, to catch closures
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "PollingConfig":
+        raw = raw or {}
+        return cls(**{k: raw[k] for k in cls.__dataclass_fields__ if k in raw})
+
+
+@dataclass(frozen=True)
+class ParsingConfig:
+    streaming: bool = False           # decode payloads job by job as they download (parses unchanged bodies too)
+    process_pool: bool = False        # parse raw payloads in worker processes (wins over streaming)
+    pool_workers: Optional[int] = None  # None = os.cpu_count()
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "ParsingConfig":
+        raw = raw or {}
+        return cls(**{k: raw[k] for k in cls.__dataclass_fields__ if k in raw})
+
+
+@dataclass(frozen=True)
+class DaemonConfig:
+    interval: int = 5 * 60   # seconds between cycle starts in --daemon mode
+    jitter: float = 0.1      # ± fraction of interval, spreads load on the ATS hosts
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "DaemonConfig":
+        raw = raw or {}
+        return cls(**{k: raw[k] for k in cls.__dataclass_fields__ if k in raw})
+
+
+@dataclass(frozen=True)
+class MetricsConfig:
+    # written at the end of every run / daemon cycle; empty disables
+    prometheus_path: Optional[str] = "metrics/crawler.prom"
+    json_path: Optional[str] = "metrics/crawler.json"
+    top_feeds: int = 10               # slowest feeds listed in both reports
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "MetricsConfig":
+        raw = raw or {}
+        return cls(**{k: raw[k] for k in cls.__dataclass_fields__ if k in raw})
+
+
+@dataclass(frozen=True)
+class BrowserConfig:
+    # one Chromium per process, shared by the custom crawlers and launched
+    # only when a cached session capture is missing, expired or rejected
+    headless: bool = True
+    max_contexts: int = 2             # isolated browser contexts open at once
+    capture_timeout: float = 30.0     # seconds a page may take to yield its artifacts
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "BrowserConfig":
+        raw = raw or {}
+        return cls(**{k: raw[k] for k in cls.__dataclass_fields__ if k in raw})
+
+
+@dataclass(frozen=True)
+class ArchiveConfig:
+    # postings closed this long move from `jobs` to `jobs_archive`; empty disables
+    after_days: Optional[int] = 30
+    batch_size: int = 1000            # rows moved per transaction
+    max_batches: int = 20             # per run / daemon cycle, so a backlog drains over several
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "ArchiveConfig":
+        raw = raw or {}
+        return cls(**{k: raw[k] for k in cls.__dataclass_fields__ if k in raw})
+
+
+@dataclass(frozen=True)
+class CrawlConfig:
+    scheduler: SchedulerConfig = field(default_factory=SchedulerConfig)
+    pipeline: PipelineConfig = field(default_factory=PipelineConfig)
+    polling: PollingConfig = field(default_factory=PollingConfig)
+    parsing: ParsingConfig = field(default_factory=ParsingConfig)
+    daemon: DaemonConfig = field(default_factory=DaemonConfig)
+    metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    browser: BrowserConfig = field(default_factory=BrowserConfig)
+    archive: ArchiveConfig = field(default_factory=ArchiveConfig)
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "CrawlConfig":
+        raw = raw or {}
+        return cls(
+            scheduler=SchedulerConfig.from_dict(raw.get("scheduler")),
+            pipeline=PipelineConfig.from_dict(raw.get("pipeline")),
+            polling=PollingConfig.from_dict(raw.get("polling")),
+            parsing=ParsingConfig.from_dict(raw.get("parsing")),
+            daemon=DaemonConfig.from_dict(raw.get("daemon")),
+            metrics=MetricsConfig.from_dict(raw.get("metrics")),
+            browser=BrowserConfig.from_dict(raw.get("browser")),
+            archive=ArchiveConfig.from_dict(raw.get("archive")),
+        )
+
+
+def load_config(yaml_path: Path = CONFIG_YAML, cache_path: Path = CONFIG_CACHE) -> CrawlConfig:
+    if not yaml_path.is_file():
+        return CrawlConfig()
+    return CrawlConfig.from_dict(load_compiled_yaml(yaml_path, cache_path, lambda raw: raw))
@@ -0,0 +1,152 @@
+"""
+Browser-captured session artifacts, cached so plain HTTP can do the work.
+
+A custom crawler splits into a *capture* (drive the careers page in a
+browser context and pull out whatever its API needs – cookies, headers,
+a GraphQL doc_id, a Next.js buildId) and a *request* (the API call itself,
+over the shared aiohttp session). Captures are kept for a TTL, in memory
+and in the session_artifacts table so they survive across runs, and are
+redone early only when the request raises StaleArtifacts – an auth
+failure (401/403) or a response that no longer has the expected shape.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from src.crawler import metrics
+from src.crawler.custom.browser import BrowserPool
+from src.crawler.db import get_session
+
+log = logging.getLogger("artifacts")
+
+T = TypeVar("T")
+# browser context -> JSON-serialisable artifacts
+Capture = Callable[[Any], Awaitable[Dict[str, Any]]]
+
+
+class StaleArtifacts(Exception):
+    """Raised by a request when the cached artifacts were rejected – triggers one re-capture."""
+
+
+@dataclass
+class Artifacts:
+    name: str
+    data: Dict[str, Any]
+    captured_at: datetime
+    expires_at: datetime
+
+    def fresh(self, now: datetime) -> bool:
+        return self.expires_at > now
+
+
+class ArtifactStore:
+    """
+    TTL cache in front of the browser. One lock per artifact name, so
+    feeds that need the same session at once wait for a single capture.
+    The database copy is best-effort: if it can't be read or written the
+    store still works, it just captures more often.
+    """
+
+    def __init__(self, browsers: BrowserPool, persist: bool = True):
+        self.browsers = browsers
+        self.persist = persist
+        self._cache: Dict[str, Artifacts] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.captures = 0
+        self.hits = 0
+
+    async def get(
+        self,
+        name: str,
+        capture: Capture,
+        ttl: float,
+        stale: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Cached artifacts for *name*, capturing them if missing or expired.
+        Passing the *stale* data a request just had rejected forces a fresh
+        capture – unless another task has already replaced it meanwhile.
+        """
+        async with self._locks[name]:
+            now = datetime.now(timezone.utc)
+            cached = self._cache.get(name)
+            if cached is None:
+                cached = await self._load(name)
+            if cached is not None and cached.fresh(now) and (stale is None or cached.data is not stale):
+                self._cache[name] = cached
+                self.hits += 1
+                return cached.data
+
+            with metrics.stage("browser"):
+                async with self.browsers.context() as ctx:
+                    data = await capture(ctx)
+            self.captures += 1
+            fresh = Artifacts(name, data, now, now + timedelta(seconds=ttl))
+            self._cache[name] = fresh
+            await self._save(fresh)
+            log.info("%s – captured session artifacts (valid %ds)", name, ttl)
+            return data
+
+    async def call(
+        self,
+        name: str,
+        capture: Capture,
+        ttl: float,
+        request: Callable[[Dict[str, Any]], Awaitable[T]],
+    ) -> T:
+        """Run *request* with cached artifacts; on StaleArtifacts re-capture once and retry."""
+        data = await self.get(name, capture, ttl)
+        try:
+            return await request(data)
+        except StaleArtifacts as exc:
+            log.info("%s – cached artifacts rejected (%s), re-capturing", name, exc)
+            data = await self.get(name, capture, ttl, stale=data)
+            return await request(data)
+
+    async def _load(self, name: str) -> Optional[Artifacts]:
+        if not self.persist:
+            return None
+        from sqlalchemy import select
+        from src.crawler.models import SessionArtifact
+
+        try:
+            async for session in get_session():
+                row = (await session.execute(
+                    select(SessionArtifact).where(SessionArtifact.name == name)
+                )).scalar_one_or_none()
+        except Exception as exc:
+            log.warning("%s – could not load cached artifacts: %s", name, exc)
+            return None
+        if row is None:
+            return None
+        return Artifacts(row.name, row.data, row.captured_at, row.expires_at)
+
+    async def _save(self, artifacts: Artifacts) -> None:
+        if not self.persist:
+            return
+        from sqlalchemy.dialects.postgresql import insert
+        from src.crawler.models import SessionArtifact
+
+        stmt = insert(SessionArtifact).values(
+            name=artifacts.name,
+            data=artifacts.data,
+            captured_at=artifacts.captured_at,
+            expires_at=artifacts.expires_at,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SessionArtifact.name],
+            set_={
+                "data": stmt.excluded.data,
+                "captured_at": stmt.excluded.captured_at,
+                "expires_at": stmt.excluded.expires_at,
+            },
+        )
+        try:
+            async for session in get_session():
+                await session.execute(stmt)
+                await session.commit()
+        except Exception as exc:
+            log.warning("%s – could not persist captured artifacts: %s", artifacts.name, exc)
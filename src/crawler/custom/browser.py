@@ -0,0 +1,75 @@
+"""
+Shared headless Chromium for the custom crawlers.
+
+Launching a browser costs seconds and a few hundred MB, so every custom
+crawler borrows contexts from one pool instead of starting its own
+Chromium. Nothing is launched (or even imported) until the first context
+is requested – with warm artifacts (see artifacts.py) most runs never get
+that far.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from src.crawler.config import BrowserConfig
+
+log = logging.getLogger("browser")
+
+
+class BrowserPool:
+    """
+    One lazily launched Chromium, handing out at most max_contexts
+    isolated contexts at a time. Contexts are cheap and closed after each
+    use so captures never share cookies; the browser itself lives until
+    close(), and is relaunched if it crashes in between.
+    """
+
+    def __init__(self, config: Optional[BrowserConfig] = None):
+        self.config = config or BrowserConfig()
+        self._slots = asyncio.Semaphore(self.config.max_contexts)
+        self._launch_lock = asyncio.Lock()
+        self._playwright: Any = None
+        self._browser: Any = None
+        self.launches = 0
+        self.contexts = 0
+
+    async def _ensure_browser(self) -> Any:
+        async with self._launch_lock:
+            if self._browser is None or not self._browser.is_connected():
+                # heavy, and only needed when a capture actually runs
+                from playwright.async_api import async_playwright
+
+                t0 = time.monotonic()
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.config.headless)
+                self.launches += 1
+                log.info("Chromium launched in %.1fs", time.monotonic() - t0)
+        return self._browser
+
+    @asynccontextmanager
+    async def context(self, **options: Any) -> AsyncIterator[Any]:
+        """A fresh BrowserContext (playwright new_context options), closed on exit."""
+        async with self._slots:
+            browser = await self._ensure_browser()
+            ctx = await browser.new_context(**options)
+            ctx.set_default_timeout(self.config.capture_timeout * 1000)
+            self.contexts += 1
+            try:
+                yield ctx
+            finally:
+                await ctx.close()
+
+    @property
+    def started(self) -> bool:
+        return self._browser is not None
+
+    async def close(self) -> None:
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
@@ -1,80 +1,140 @@
-import asyncio
 import json
-import httpx
-from playwright.async_api import async_playwright
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import aiohttp
+
+from src.crawler.custom.artifacts import StaleArtifacts
+from src.crawler.http_client import wait_turn
 
 GRAPHQL_NAME = "CareersJobSearchResultsDataQuery"
 GRAPHQL_URL = "https://www.metacareers.com/api/graphql"
-HARDCODED_DOC_ID = "29615178951461218"
-
-async def get_headers_from_browser():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context()
-        page = await context.new_page()
-
-        headers = {}
-
-        async def intercept_request(route, request):
-            nonlocal headers
-            if request.url.endswith("/api/graphql"):
-                if request.headers.get("fb-api-req-friendly-name") == GRAPHQL_NAME:
-                    headers = request.headers
-                    await route.abort()
-                    return
-            await route.continue_()
-
-        await page.route("**/*", intercept_request)
-        await page.goto("https://www.metacareers.com/jobs")
-        await page.wait_for_timeout(6000)
-        await browser.close()
-        return headers
-
-def make_graphql_call(headers):
-    payload = {
-        "doc_id": HARDCODED_DOC_ID,
-        "variables": json.dumps({
-            "results_per_page": 25,
-            "cursor": None,
-            "search_input": {
-                "q": None,
-                "leadership_levels": [],
-                "teams": [],
-                "sub_teams": [],
-                "roles": [],
-                "offices": [],
-                "divisions": [],
-                "saved_jobs": [],
-                "saved_searches": []
-            }
-        })
+JOBS_PAGE = "https://www.metacareers.com/jobs"
+HARDCODED_DOC_ID = "29615178951461218"   # used when the captured request carries none
+ARTIFACTS = "meta"
+ARTIFACT_TTL = 6 * 60 * 60               # seconds; the site's session cookies outlive this
+RESULTS_PER_PAGE = 25
+
+# request headers worth replaying; the rest are per-request or set by aiohttp
+_REPLAY_HEADERS = ("user-agent", "accept-language", "x-fb-lsd", "x-asbd-id")
+# form fields of the captured query that describe the query, not the session
+_QUERY_FIELDS = ("doc_id", "variables", "fb_api_req_friendly_name", "fb_api_caller_class")
+
+
+async def capture_session(context: Any) -> Dict[str, Any]:
+    """
+    Load the jobs page and intercept its own search query: the session
+    cookies, the replayable headers, the current doc_id and the form
+    tokens (lsd, jazoest, ...) that a plain POST has to carry along.
+    """
+    page = await context.new_page()
+
+    def is_search(request) -> bool:
+        return request.url.endswith("/api/graphql") and GRAPHQL_NAME in (request.post_data or "")
+
+    async def intercept_request(route, request):
+        if is_search(request):
+            await route.abort()   # its headers are all we want – don't spend a real query
+            return
+        await route.continue_()
+
+    await page.route("**/*", intercept_request)
+    # bounded by the pool's capture_timeout (the context default)
+    async with page.expect_request(is_search) as search:
+        await page.goto(JOBS_PAGE)
+    request = await search.value
+    headers = await request.all_headers()
+    form = dict(parse_qsl(request.post_data or ""))
+
+    cookies = await context.cookies(GRAPHQL_URL)
+    return {
+        "cookie": "; ".join(f"{c['name']}={c['value']}" for c in cookies),
+        "headers": {k: v for k, v in headers.items() if k in _REPLAY_HEADERS},
+        "doc_id": form.get("doc_id") or HARDCODED_DOC_ID,
+        "form": {k: v for k, v in form.items() if k not in _QUERY_FIELDS},
     }
 
-    required_headers = {
+
+def search_variables(cursor: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "results_per_page": RESULTS_PER_PAGE,
+        "cursor": cursor,
+        "search_input": {
+            "q": None,
+            "leadership_levels": [],
+            "teams": [],
+            "sub_teams": [],
+            "roles": [],
+            "offices": [],
+            "divisions": [],
+            "saved_jobs": [],
+            "saved_searches": [],
+        },
+    }
+
+
+async def search_jobs_page(
+    http: aiohttp.ClientSession, artifacts: Dict[str, Any], cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    One page of the job search over plain HTTP, as the GraphQL `data`
+    object. Raises StaleArtifacts when the session is refused or the answer
+    isn't a query result any more (typically a rotated doc_id).
+    """
+    payload = {
+        **artifacts["form"],
+        "doc_id": artifacts["doc_id"],
+        "fb_api_req_friendly_name": GRAPHQL_NAME,
+        "variables": json.dumps(search_variables(cursor)),
+    }
+    headers = {
+        **artifacts["headers"],
         "Content-Type": "application/x-www-form-urlencoded",
         "fb-api-req-friendly-name": GRAPHQL_NAME,
-        "cookie": headers.get("cookie", ""),
-        "user-agent": headers.get("user-agent", ""),
+        "cookie": artifacts["cookie"],
         "origin": "https://www.metacareers.com",
-        "referer": "https://www.metacareers.com/jobs"
+        "referer": JOBS_PAGE,
     }
+    await wait_turn(http, GRAPHQL_URL)
+    async with http.post(GRAPHQL_URL, data=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+        if resp.status in (401, 403):
+            raise StaleArtifacts(f"HTTP {resp.status}")
+        resp.raise_for_status()
+        text = await resp.text()
 
-    response = httpx.post(GRAPHQL_URL, data=payload, headers=required_headers)
-    print("✅ Status:", response.status_code)
-    if response.headers.get("content-type", "").startswith("application/json"):
-        print(json.dumps(response.json(), indent=2)[:1500])
-    else:
-        print("❌ Not a JSON response")
-        print(response.text[:1000])
-
-async def main():
-    print("🎯 Launching browser to get real session headers...")
-    headers = await get_headers_from_browser()
-    if headers:
-        print("✅ Got headers. Now hitting API directly.")
-        make_graphql_call(headers)
+    try:
+        # error and redirect answers come back as HTML, sometimes with a 200
+        body = json.loads(text.removeprefix("for (;;);"))
+    except ValueError:
+        raise StaleArtifacts("response is not JSON") from None
+    if not isinstance(body, dict) or not body.get("data"):
+        keys = ", ".join(body) if isinstance(body, dict) else type(body).__name__
+        raise StaleArtifacts(f"unexpected response shape: {keys or 'empty'}")
+    return body["data"]
+
+
+def parse_search_page(data: Dict[str, Any]) -> Tuple[List[dict], Optional[str]]:
+    """(postings, cursor of the next page or None) of one search page."""
+    result = data.get("job_search_with_featured_jobs") or data.get("job_search")
+    if isinstance(result, list):   # older doc_ids answer with a bare, unpaged list
+        return result, None
+    if not isinstance(result, dict):
+        raise StaleArtifacts("no job search result in response")
+    postings = result.get("all_jobs") or result.get("jobs") or []
+    page_info = result.get("page_info") or {}
+    if page_info:
+        cursor = page_info.get("end_cursor") if page_info.get("has_next_page") else None
     else:
-        print("❌ Failed to capture headers")
+        cursor = result.get("next_cursor") or result.get("cursor")
+    return postings, cursor
+
+
+async def fetch_search_page(
+    http: aiohttp.ClientSession, artifacts: Dict[str, Any], cursor: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    search_jobs_page + parse_search_page, as one ArtifactStore request: a
+    page without a search result is a stale session too and gets the retry.
+    """
+    return parse_search_page(await search_jobs_page(http, artifacts, cursor))
 
-if __name__ == "__main__":
-    asyncio.run(main())
@@ -1,25 +1,59 @@
-from playwright.async_api import async_playwright
-import json, re, asyncio
+import json
+import re
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from src.crawler.custom.artifacts import StaleArtifacts
+from src.crawler.http_client import wait_turn
 
 NEXT_RE = re.compile(r'__NEXT_DATA__"\s*type="application/json">(.*?)</script>', re.S)
+CAREERS_URL = "https://www.uber.com/us/en/careers/list/"
+NEXT_DATA_URL = "https://www.uber.com/_next/data/{build_id}/us/en/careers/list.json"
+ARTIFACTS = "uber"
+ARTIFACT_TTL = 24 * 60 * 60   # seconds; a new deploy rotates the buildId, which shows up as a 404
+
 
-async def refresh_uber_build_id():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page    = await browser.new_page()
-        await page.goto("https://www.uber.com/us/en/careers/list/")
-        html    = await page.content()
+async def capture_session(context: Any) -> Dict[str, Any]:
+    """Render the careers list once for the Next.js buildId and the cookies it was served with."""
+    page = await context.new_page()
+    await page.goto(CAREERS_URL)
+    html = await page.content()
 
-        m = NEXT_RE.search(html)
-        data = json.loads(m.group(1)) if m else {}
-        build_id = data.get("buildId")
-        first_batch = data.get("props", {}).get("pageProps", {}).get("jobs", [])
+    m = NEXT_RE.search(html)
+    data = json.loads(m.group(1)) if m else {}
+    if not data.get("buildId"):
+        raise RuntimeError(f"no __NEXT_DATA__ buildId on {CAREERS_URL}")
+    cookies = await context.cookies(CAREERS_URL)
+    return {
+        "build_id": data["buildId"],
+        "cookie": "; ".join(f"{c['name']}={c['value']}" for c in cookies),
+        "user_agent": await page.evaluate("navigator.userAgent"),
+    }
 
-        print("Uber build-ID:", build_id)
-        print("First batch:", len(first_batch), "jobs")
 
-        await browser.close()
-        return build_id, first_batch
+async def fetch_page_props(
+    http: aiohttp.ClientSession, artifacts: Dict[str, Any], page: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    The list page's props (page *page* of the results, 1-based) from its
+    Next.js data route over plain HTTP.
+    A 404 means the buildId was rotated by a deploy; that, a refused
+    session or a body without pageProps raise StaleArtifacts.
+    """
+    url = NEXT_DATA_URL.format(build_id=artifacts["build_id"])
+    headers = {"cookie": artifacts["cookie"], "user-agent": artifacts["user_agent"], "x-nextjs-data": "1"}
+    params = {"page": str(page)} if page and page > 1 else None
+    await wait_turn(http, url)
+    async with http.get(url, params=params, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+        if resp.status in (401, 403, 404):
+            raise StaleArtifacts(f"HTTP {resp.status}")
+        resp.raise_for_status()
+        try:
+            body = await resp.json(content_type=None)
+        except ValueError:
+            raise StaleArtifacts("response is not JSON") from None
+    if not isinstance(body, dict) or "pageProps" not in body:
+        raise StaleArtifacts("no pageProps in response")
+    return body["pageProps"]
 
-if __name__ == "__main__":
-    asyncio.run(refresh_uber_build_id())
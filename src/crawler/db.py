@@ -1,56 +1,153 @@
 import os
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from typing import TYPE_CHECKING, Optional
 from dotenv import load_dotenv
 from urllib.parse import urlparse, parse_qs
 
-from shared.db.base import Base
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+    from sqlalchemy.orm import sessionmaker
 
 load_dotenv()
 
-raw_url = os.getenv("DATABASE_URL")
-if raw_url is None:
-    raise RuntimeError("DATABASE_URL is not set in .env")
-
-# ── normalise to asyncpg and handle SSL parameters ──────────────────────────────
-if raw_url.startswith("postgres://"):
-    async_url = raw_url.replace("postgres://", "postgresql+asyncpg://", 1)
-elif raw_url.startswith("postgresql://"):
-    async_url = raw_url.replace("postgresql://", "postgresql+asyncpg://", 1)
-else:
-    async_url = raw_url  # assume caller already gave the +asyncpg prefix
-
-# Parse URL to extract and remove problematic SSL parameters
-parsed = urlparse(async_url)
-if parsed.query:
-    # Remove sslmode and channel_binding parameters that asyncpg doesn't understand
-    query_params = parse_qs(parsed.query)
-    # Filter out problematic parameters
-    filtered_params = {k: v for k, v in query_params.items() 
-                      if k not in ['sslmode', 'channel_binding']}
-    
-    # Reconstruct URL without problematic parameters
-    if filtered_params:
-        new_query = '&'.join([f"{k}={v[0]}" for k, v in filtered_params.items()])
-        async_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}?{new_query}"
+
+def _async_url() -> str:
+    raw_url = os.getenv("DATABASE_URL")
+    if raw_url is None:
+        raise RuntimeError("DATABASE_URL is not set in .env")
+
+    # ── normalise to asyncpg and handle SSL parameters ──────────────────────────────
+    if raw_url.startswith("postgres://"):
+        async_url = raw_url.replace("postgres://", "postgresql+asyncpg://", 1)
+    elif raw_url.startswith("postgresql://"):
+        async_url = raw_url.replace("postgresql://", "postgresql+asyncpg://", 1)
     else:
-        async_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+        async_url = raw_url  # assume caller already gave the +asyncpg prefix
+
+    # Parse URL to extract and remove problematic SSL parameters
+    parsed = urlparse(async_url)
+    if parsed.query:
+        # Remove sslmode and channel_binding parameters that asyncpg doesn't understand
+        query_params = parse_qs(parsed.query)
+        # Filter out problematic parameters
+        filtered_params = {k: v for k, v in query_params.items()
+                          if k not in ['sslmode', 'channel_binding']}
+
+        # Reconstruct URL without problematic parameters
+        if filtered_params:
+            new_query = '&'.join([f"{k}={v[0]}" for k, v in filtered_params.items()])
+            async_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}?{new_query}"
+        else:
+            async_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+    return async_url
+
 
-# For Neon and other cloud providers, SSL is required by default with asyncpg
-# TODO: set echo=False in production
-engine = create_async_engine(async_url, echo=False, connect_args={"ssl": "require"})
+# Built on first use rather than at import, so importing this module (or
+# anything that imports it) costs nothing until a query actually runs; the
+# same goes for SQLAlchemy itself (~400 ms of imports), pulled in here and
+# by the call sites of db_utils / models rather than at module level.
+_engine: Optional["AsyncEngine"] = None
+_session_factory: Optional["sessionmaker"] = None
 
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+def get_engine() -> "AsyncEngine":
+    global _engine
+    if _engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        # For Neon and other cloud providers, SSL is required by default with asyncpg
+        # TODO: set echo=False in production
+        # pool_pre_ping: the --daemon worker keeps connections across idle gaps
+        _engine = create_async_engine(
+            _async_url(), echo=False, pool_pre_ping=True, connect_args={"ssl": "require"}
+        )
+    return _engine
+
+def _sessions() -> "sessionmaker":
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.orm import sessionmaker
+        _session_factory = sessionmaker(
+            bind=get_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+    return _session_factory
 
 # ── helpers ───────────────────────────────────────────────────────────
+# create_all only creates missing tables; columns, indexes and constraints
+# added to existing tables are listed here and applied idempotently on every
+# start.
+COLUMN_MIGRATIONS = [
+    "ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS last_crawled_at TIMESTAMPTZ",
+    "ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS last_changed_at TIMESTAMPTZ",
+    "ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS change_rate DOUBLE PRECISION NOT NULL DEFAULT 1.0",
+    "ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS job_count INTEGER",
+    "ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS poll_interval INTEGER",
+    "ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS next_due_at TIMESTAMPTZ",
+    "ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS last_full_sweep_at TIMESTAMPTZ",
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS content_hash VARCHAR(32)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_feed ON jobs (company, source_feed, external_id)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_closed ON jobs (updated_at) WHERE NOT is_active",
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS description_hash VARCHAR(32)",
+    "ALTER TABLE jobs_archive ADD COLUMN IF NOT EXISTS description_hash VARCHAR(32)",
+    # the alert queue coalesces per job: drop duplicates queued before that
+    "DELETE FROM job_alert_queue a USING job_alert_queue b WHERE a.job_id = b.job_id AND a.id < b.id",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_alert_queue_job ON job_alert_queue (job_id)",
+    # jobs.id was int4 with an int4 sequence; one-off rewrite, skipped once bigint
+    """DO $$ BEGIN
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'jobs' AND column_name = 'id') = 'integer' THEN
+            ALTER TABLE jobs ALTER COLUMN id TYPE BIGINT;
+            EXECUTE format('ALTER SEQUENCE %s AS BIGINT', pg_get_serial_sequence('jobs', 'id'));
+        END IF;
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'jobs_archive' AND column_name = 'id') = 'integer' THEN
+            ALTER TABLE jobs_archive ALTER COLUMN id TYPE BIGINT;
+        END IF;
+    END $$""",
+]
+
+async def _move_inline_descriptions(conn) -> None:
+    """
+    One-off: descriptions used to be an inline TEXT column. Compress what is
+    left there into job_descriptions, point the rows at it, drop the column.
+    Compression happens here in Python, so this can't be a plain DDL entry.
+    """
+    from sqlalchemy import text
+    from src.crawler.models import JobDescription
+    from src.crawler.schemas import description_key
+
+    for table in ("jobs", "jobs_archive"):
+        inline = await conn.scalar(text(
+            "SELECT 1 FROM information_schema.columns"
+            " WHERE table_schema = current_schema() AND table_name = :table AND column_name = 'description'"
+        ), {"table": table})
+        if not inline:
+            continue
+        rows = (await conn.execute(text(f"SELECT id, description FROM {table} WHERE description IS NOT NULL"))).all()
+        keys = {row.id: description_key(row.description) for row in rows}
+        bodies = {key: JobDescription.compress(row.description) for row in rows if (key := keys[row.id])}
+        if bodies:
+            await conn.execute(
+                text("INSERT INTO job_descriptions (hash, body) VALUES (:hash, :body) ON CONFLICT DO NOTHING"),
+                [{"hash": key, "body": body} for key, body in bodies.items()],
+            )
+            await conn.execute(
+                text(f"UPDATE {table} SET description_hash = :hash WHERE id = :id"),
+                [{"id": id_, "hash": key} for id_, key in keys.items() if key],
+            )
+        await conn.execute(text(f"ALTER TABLE {table} DROP COLUMN description"))
+
 async def init_db() -> None:
-    async with engine.begin() as conn:
+    from sqlalchemy import text
+    from shared.db.base import Base
+    import src.crawler.models, src.notifications.models  # noqa: F401 – the tables create_all makes
+
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        for ddl in COLUMN_MIGRATIONS:
+            await conn.execute(text(ddl))
+        await _move_inline_descriptions(conn)
 
 async def get_session():
-    async with AsyncSessionLocal() as session:
+    async with _sessions()() as session:
         yield session
@@ -2,17 +2,17 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timezone
-from typing import List
+from datetime import datetime
+from typing import Collection, Dict, List, Tuple
 
-from sqlalchemy import select, update, func, tuple_
+from sqlalchemy import ARRAY, String, bindparam, exists, select, text, update, func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.dialects.postgresql import insert
 
-from src.crawler.models import JobRecord
-from src.notifications.models import JobAlertQueue
-from src.crawler.schemas import Job
+from src.crawler.models import FeedState, JobArchive, JobDescription, JobRecord
+import src.notifications.models  # noqa: F401 – job_alert_queue, filled by _MERGE_STAGE; init_db creates it
+from src.crawler.schemas import FeedKey, FetchState, Job
 
 log = logging.getLogger(__name__)
 
@@ -24,6 +24,7 @@ async def upsert_job(job: Job, session: AsyncSession) -> None:
     Insert or update one job **using the caller-supplied session**.
     Caller must commit/rollback.
     """
+    await store_descriptions([job], session)
     stmt = select(JobRecord).where(
         JobRecord.external_id == job.external_id,
         JobRecord.company == job.company,
@@ -42,9 +43,10 @@ async def upsert_job(job: Job, session: AsyncSession) -> None:
         existing.is_remote        = job.is_remote
         existing.job_url          = job.job_url
         existing.apply_url        = job.apply_url
-        existing.description      = job.description
+        existing.description_hash = job.description_hash()
         existing.posted_at        = job.posted_at
         existing.job_updated_at   = job.job_updated_at
+        existing.content_hash     = job.content_hash()
         # keep updated_at column auto-updating via onupdate=func.now()
     else:
         session.add(
@@ -61,87 +63,174 @@ async def upsert_job(job: Job, session: AsyncSession) -> None:
                 is_remote       = job.is_remote,
                 job_url         = job.job_url,
                 apply_url       = job.apply_url,
-                description     = job.description,
+                description_hash= job.description_hash(),
                 posted_at       = job.posted_at,
                 job_updated_at  = job.job_updated_at,
+                content_hash    = job.content_hash(),
                 is_active       = True,
             )
         )
 
+async def store_descriptions(jobs: List[Job], session: AsyncSession) -> None:
+    """
+    Make sure every description of *jobs* has its job_descriptions row.
+    Only texts not stored yet are compressed and sent; identical text
+    across postings (or runs) is stored once. Caller commits.
+    """
+    texts = {}
+    for job in jobs:
+        key = job.description_hash()
+        if key is not None:
+            texts.setdefault(key, job.description)
+    if not texts:
+        return
+    stored = set((await session.execute(
+        select(JobDescription.hash).where(JobDescription.hash == func.any(bindparam("keys", list(texts), type_=ARRAY(String))))
+    )).scalars())
+    missing = [{"hash": key, "body": JobDescription.compress(t)} for key, t in texts.items() if key not in stored]
+    if missing:
+        # a concurrent writer may store the same text first
+        await session.execute(insert(JobDescription).values(missing).on_conflict_do_nothing(index_elements=["hash"]))
+
 async def deactivate_missing(
     company: str,
     source_feed: str,
     seen_ids: List[str],
     session: AsyncSession,
-) -> None:
-    """Mark rows not seen in this crawl as inactive."""
-    await session.execute(
+) -> int:
+    """
+    Mark active rows not seen in this crawl as inactive; returns how many.
+
+    The seen ids travel as one array parameter and are anti-joined through
+    unnest(), which Postgres can run as a hash anti-join over the feed's rows
+    (ix_jobs_feed). The NOT IN list it replaces cost one bind parameter per
+    id and a linear probe per row, and rewrote rows already inactive.
+    """
+    # render_derived: `AS anon_1(external_id)` – a bare alias would name the
+    # unnested column anon_1 itself
+    seen = (
+        func.unnest(bindparam("seen_ids", seen_ids, type_=ARRAY(String)))
+        .table_valued("external_id")
+        .render_derived()
+    )
+    result = await session.execute(
         update(JobRecord)
         .where(
             JobRecord.company == company,
             JobRecord.source_feed == source_feed,
-            JobRecord.external_id.not_in(seen_ids),
+            JobRecord.is_active.is_(True),
+            ~exists().where(seen.c.external_id == JobRecord.external_id),
         )
-        .values(is_active=False)
+        .values(is_active=False, updated_at=func.now())
+        .execution_options(synchronize_session=False)
     )
+    return result.rowcount
+
+# Batch upserts go through a per-connection temp table: rows are streamed in
+# with asyncpg's binary COPY (no bind-parameter limit, no per-row dicts) and
+# merged into `jobs` by one INSERT ... SELECT ... ON CONFLICT whose text never
+# changes, so Postgres and SQLAlchemy can cache it.
+STAGE_COLUMNS = (
+    "external_id", "company", "source_feed", "title", "department", "team", "employment_type",
+    "countries", "cities", "is_remote", "job_url", "apply_url", "description_hash",
+    "posted_at", "job_updated_at", "content_hash",
+)
+_KEY_COLUMNS = ("external_id", "company", "source_feed")
+
+# ON COMMIT DELETE ROWS: every transaction starts with an empty stage
+_CREATE_STAGE = text("""
+CREATE TEMP TABLE IF NOT EXISTS jobs_stage (
+    external_id VARCHAR NOT NULL, company VARCHAR NOT NULL, source_feed VARCHAR NOT NULL,
+    title VARCHAR NOT NULL, department VARCHAR, team VARCHAR, employment_type VARCHAR,
+    countries VARCHAR[], cities VARCHAR[], is_remote BOOLEAN, job_url VARCHAR NOT NULL,
+    apply_url VARCHAR, description_hash VARCHAR(32), posted_at TIMESTAMPTZ, job_updated_at TIMESTAMPTZ,
+    content_hash VARCHAR(32)
+) ON COMMIT DELETE ROWS
+""")
 
-async def bulk_upsert_jobs(jobs: List[Job], session: AsyncSession) -> None:
+_CLEAR_STAGE = text("DELETE FROM jobs_stage")   # not TRUNCATE: no new relfilenode per batch
+
+# One statement merges the stage into `jobs` and queues alerts for what
+# actually changed. `todo` drops unchanged postings before the INSERT: every
+# row an INSERT ... ON CONFLICT sees draws a jobs_id_seq value, even one that
+# ends as a no-op conflict, so a re-crawl of an unchanged board would burn an
+# id per posting. The conflict WHERE still guards rows another writer changed
+# meanwhile. An unchanged posting thus costs no new tuple, WAL, index update
+# or id, and RETURNING yields exactly the new and changed postings, each
+# queued at most once however often it changes before the notifier runs.
+# `prev` (same snapshot, so pre-merge values) tells a real edit from the
+# one-off hash backfill of rows written before content_hash existed.
+_MERGE_STAGE = text(f"""
+WITH stage AS (
+    SELECT DISTINCT ON ({", ".join(_KEY_COLUMNS)}) * FROM jobs_stage
+), prev AS (
+    SELECT jobs.id, {", ".join(f"jobs.{c}" for c in _KEY_COLUMNS)},
+           jobs.content_hash, jobs.job_updated_at, jobs.posted_at, jobs.is_active
+    FROM jobs JOIN stage USING ({", ".join(_KEY_COLUMNS)})
+), todo AS (
+    SELECT stage.* FROM stage LEFT JOIN prev USING ({", ".join(_KEY_COLUMNS)})
+    WHERE prev.id IS NULL
+       OR prev.content_hash IS DISTINCT FROM stage.content_hash
+       OR prev.is_active IS NOT TRUE
+), merged AS (
+    INSERT INTO jobs ({", ".join(STAGE_COLUMNS)}, is_active)
+    SELECT {", ".join(STAGE_COLUMNS)}, true FROM todo
+    ON CONFLICT ON CONSTRAINT uq_job_key DO UPDATE SET
+        {", ".join(f"{c} = excluded.{c}" for c in STAGE_COLUMNS if c not in _KEY_COLUMNS)},
+        is_active = true,
+        updated_at = now()
+    WHERE jobs.content_hash IS DISTINCT FROM excluded.content_hash OR jobs.is_active IS NOT TRUE
+    RETURNING id, company, source_feed, job_updated_at, posted_at, (xmax = 0) AS inserted
+), changed AS (
+    SELECT merged.* FROM merged LEFT JOIN prev USING (id)
+    WHERE merged.inserted
+       OR NOT prev.is_active
+       OR prev.content_hash IS NOT NULL
+       OR (prev.job_updated_at, prev.posted_at) IS DISTINCT FROM (merged.job_updated_at, merged.posted_at)
+), queued AS (
+    -- a job still waiting from an earlier run keeps its single entry
+    INSERT INTO job_alert_queue (job_id, processed) SELECT id, false FROM changed
+    ON CONFLICT (job_id) DO UPDATE SET processed = false, updated_at = now()
+)
+SELECT company, source_feed, count(*) AS changed, count(*) FILTER (WHERE inserted) AS inserted
+FROM changed GROUP BY company, source_feed
+""")
+
+FeedChanges = Dict[Tuple[str, str], Tuple[int, int]]   # (company, source_feed) -> (changed, inserted)
+
+async def bulk_upsert_jobs(jobs: List[Job], session: AsyncSession) -> FeedChanges:
     """
-    Bulk upsert jobs with error handling.
+    Bulk upsert jobs with error handling: store new descriptions, COPY into
+    jobs_stage, then one statement that merges it into `jobs` and queues an
+    alert for every new or changed posting. Returns how many postings moved
+    per feed. Unchanged postings are filtered out inside the statement, so a
+    whole feed can be passed: they are neither counted, rewritten nor given
+    an id. Caller commits, which also empties the stage.
     """
     if not jobs:
-        return
-    
+        return {}
+
     try:
-        # Convert Job objects to dictionaries for bulk insert
-        job_data = []
-        for job in jobs:
-            job_data.append({
-                "external_id": job.external_id,
-                "company": job.company, 
-                "source_feed": job.source_feed,
-                "title": job.title,
-                "department": job.department,
-                "team": job.team,
-                "employment_type": job.employment_type,
-                "countries": job.countries,
-                "cities": job.cities,
-                "is_remote": job.is_remote,
-                "job_url": job.job_url,
-                "apply_url": job.apply_url,
-                "description": job.description,
-                "posted_at": job.posted_at,
-                "job_updated_at": job.job_updated_at,
-                "is_active": True,
-            })
-        
-        # Use PostgreSQL's INSERT ... ON CONFLICT DO UPDATE
-        stmt = insert(JobRecord).values(job_data)
-        
-        update_dict = {
-            "title": stmt.excluded.title,
-            "department": stmt.excluded.department,
-            "team": stmt.excluded.team,
-            "employment_type": stmt.excluded.employment_type,
-            "countries": stmt.excluded.countries,
-            "cities": stmt.excluded.cities,
-            "is_remote": stmt.excluded.is_remote,
-            "job_url": stmt.excluded.job_url,
-            "apply_url": stmt.excluded.apply_url,
-            "description": stmt.excluded.description,
-            "posted_at": stmt.excluded.posted_at,
-            "job_updated_at": stmt.excluded.job_updated_at,
-            "is_active": stmt.excluded.is_active,
-            "updated_at": func.now(),
-        }
-        
-        upsert_stmt = stmt.on_conflict_do_update(
-            constraint="uq_job_key",
-            set_=update_dict
+        await store_descriptions(jobs, session)
+        # through SQLAlchemy first, so the COPY below runs inside its transaction
+        await session.execute(_CREATE_STAGE)
+        await session.execute(_CLEAR_STAGE)   # in case of an earlier call in this transaction
+        raw = await (await session.connection()).get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            "jobs_stage",
+            records=[
+                (
+                    job.external_id, job.company, job.source_feed, job.title, job.department, job.team,
+                    job.employment_type, job.countries, job.cities, job.is_remote, job.job_url, job.apply_url,
+                    job.description_hash(), job.posted_at, job.job_updated_at, job.content_hash(),
+                )
+                for job in jobs
+            ],
+            columns=STAGE_COLUMNS,
         )
-        
-        await session.execute(upsert_stmt)
-        
+        result = await session.execute(_MERGE_STAGE)
+        return {(company, feed): (changed, inserted) for company, feed, changed, inserted in result}
+
     except SQLAlchemyError as exc:
         log.error("Database error during bulk upsert: %s", exc)
         await session.rollback()
@@ -151,24 +240,108 @@ async def bulk_upsert_jobs(jobs: List[Job], session: AsyncSession) -> None:
         await session.rollback()
         raise
 
-async def enqueue_job_alerts(jobs: List[Job], session: AsyncSession) -> None:
-    if not jobs:
-        return
-    
-    
-    job_alerts=await session.execute(
-    select(JobRecord).where(
-        tuple_(
-            JobRecord.external_id,
-            JobRecord.company,
-            JobRecord.source_feed
-        ).in_([
-            (job.external_id, job.company, job.source_feed)
-            for job in jobs
-        ])
+# ───────────────────────────────────────────────
+# hot/cold split
+# ───────────────────────────────────────────────
+_ARCHIVE_COLUMNS = ", ".join(c.name for c in JobRecord.__table__.columns)
+
+# Oldest closed postings first via ix_jobs_closed; SKIP LOCKED leaves rows a
+# writer is re-opening right now for a later batch instead of waiting on it.
+_ARCHIVE_BATCH = text(f"""
+WITH moved AS (
+    DELETE FROM jobs WHERE id IN (
+        SELECT id FROM jobs
+        WHERE NOT is_active AND updated_at < :cutoff
+        ORDER BY updated_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
     )
+    RETURNING {_ARCHIVE_COLUMNS}
 )
-    job_alerts=job_alerts.scalars().all()
+INSERT INTO {JobArchive.__tablename__} ({_ARCHIVE_COLUMNS})
+SELECT {_ARCHIVE_COLUMNS} FROM moved
+""")
+
+async def archive_closed_jobs(cutoff: datetime, batch_size: int, session: AsyncSession) -> int:
+    """
+    Move up to *batch_size* postings closed before *cutoff* from `jobs` to
+    `jobs_archive` in one statement; returns how many moved. Caller commits.
+    A posting that reappears after being archived comes back as a new row
+    (and a new alert), as a repost would.
+    """
+    result = await session.execute(_ARCHIVE_BATCH, {"cutoff": cutoff, "batch_size": batch_size})
+    return result.rowcount
+
+async def load_known_jobs(
+    feeds: Collection[Tuple[str, str]], session: AsyncSession
+) -> Dict[Tuple[str, str], Dict[str, datetime]]:
+    """
+    (company, source_feed) -> {external_id: job_updated_at} of the active rows,
+    for adapters that stop paging once they reach postings they already know
+    and for those whose feed has no timestamps of its own.
+    """
+    if not feeds:
+        return {}
+    result = await session.execute(
+        select(JobRecord.company, JobRecord.source_feed, JobRecord.external_id, JobRecord.job_updated_at)
+        .where(
+            JobRecord.is_active.is_(True),
+            tuple_(JobRecord.company, JobRecord.source_feed).in_(list(feeds)),
+        )
+    )
+    known: Dict[Tuple[str, str], Dict[str, datetime]] = {}
+    for company, source_feed, external_id, job_updated_at in result:
+        known.setdefault((company, source_feed), {})[external_id] = job_updated_at
+    return known
 
-    for j in job_alerts:
-        session.add(JobAlertQueue(job_id=j.id))
\ No newline at end of file
+# ───────────────────────────────────────────────
+# per-feed fetch validators
+# ───────────────────────────────────────────────
+async def load_fetch_states(session: AsyncSession) -> Dict[FeedKey, FetchState]:
+    """One SELECT for the whole run – feed_state is one small row per feed."""
+    result = await session.execute(select(FeedState))
+    return {
+        (row.company, row.source_feed, row.url): FetchState(
+            etag=row.etag,
+            last_modified=row.last_modified,
+            body_hash=row.body_hash,
+            last_crawled_at=row.last_crawled_at,
+            last_changed_at=row.last_changed_at,
+            change_rate=row.change_rate,
+            job_count=row.job_count,
+            poll_interval=row.poll_interval,
+            next_due_at=row.next_due_at,
+            last_full_sweep_at=row.last_full_sweep_at,
+        )
+        for row in result.scalars()
+    }
+
+_STATE_FIELDS = (
+    "etag", "last_modified", "body_hash",
+    "last_crawled_at", "last_changed_at", "change_rate", "job_count", "poll_interval", "next_due_at",
+    "last_full_sweep_at",
+)
+
+async def save_fetch_states(states: Dict[FeedKey, FetchState], session: AsyncSession) -> None:
+    """Upsert state for feeds whose crawl was fully processed. Caller commits."""
+    if not states:
+        return
+
+    stmt = insert(FeedState).values([
+        {
+            "company": company,
+            "source_feed": source_feed,
+            "url": url,
+            **{f: getattr(state, f) for f in _STATE_FIELDS},
+        }
+        for (company, source_feed, url), state in states.items()
+    ])
+    await session.execute(
+        stmt.on_conflict_do_update(
+            constraint="uq_feed_key",
+            set_={
+                **{f: getattr(stmt.excluded, f) for f in _STATE_FIELDS},
+                "updated_at": func.now(),
+            },
+        )
+    )
@@ -0,0 +1,112 @@
+"""
+companies.yaml (and crawler.yaml), compiled.
+
+Importing and running the YAML parser costs ~100 ms per start; the
+validated result is cached as marshal bytes and reused until the YAML's
+mtime/size changes – and even then only re-parsed if its content hash
+changed too, so a fresh checkout with a restored cache (CI) parses nothing.
+"""
+import hashlib
+import logging
+import marshal
+import os
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+log = logging.getLogger("feed_registry")
+
+T = TypeVar("T")
+
+CACHE_VERSION = 1
+COMPANIES_YAML = Path(__file__).with_name("companies.yaml")
+# __pycache__ is already where compiled artefacts live (and is gitignored)
+CACHE_FILE = Path(__file__).with_name("__pycache__") / "companies.registry"
+
+
+class RegistryError(ValueError):
+    """companies.yaml does not have the expected shape."""
+
+
+def validate_companies(data: Any) -> List[dict]:
+    """Check the YAML structure up front instead of failing mid-crawl on a KeyError."""
+    if not isinstance(data, list):
+        raise RegistryError("companies.yaml must be a list of companies")
+
+    errors: List[str] = []
+    seen = set()
+    for i, company in enumerate(data):
+        if not isinstance(company, dict) or not isinstance(company.get("name"), str) or not company["name"]:
+            errors.append(f"entry {i}: missing company name")
+            continue
+        name = company["name"]
+        feeds = company.get("feeds") or []
+        if not isinstance(feeds, list):
+            errors.append(f"{name}: feeds must be a list")
+            continue
+        for j, feed in enumerate(feeds):
+            if not isinstance(feed, dict) or not isinstance(feed.get("ats"), str):
+                errors.append(f"{name} feed {j}: missing ats")
+                continue
+            url = feed.get("url")
+            if not isinstance(url, str) or not url.startswith(("http://", "https://")):
+                errors.append(f"{name} feed {j}: url must be http(s)")
+                continue
+            key = (name, feed["ats"], url)
+            if key in seen:
+                errors.append(f"{name} feed {j}: duplicate {feed['ats']} feed {url}")
+            seen.add(key)
+
+    if errors:
+        raise RegistryError("invalid companies.yaml:\n  " + "\n  ".join(errors))
+    return data
+
+
+def _read_cache(path: Path) -> Optional[Tuple[int, int, str, Any]]:
+    try:
+        version, mtime_ns, size, digest, value = marshal.loads(path.read_bytes())
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+    if version != CACHE_VERSION:
+        return None
+    return mtime_ns, size, digest, value
+
+
+def _write_cache(path: Path, st: os.stat_result, digest: str, value: Any) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(marshal.dumps((CACHE_VERSION, st.st_mtime_ns, st.st_size, digest, value)))
+        os.replace(tmp, path)
+    except OSError as exc:   # read-only checkout: just pay the parse every time
+        log.debug("Could not write %s: %s", path.name, exc)
+
+
+def load_compiled_yaml(yaml_path: Path, cache_path: Path, build: Callable[[Any], T]) -> T:
+    """*build*(parsed YAML), from the marshal cache when the file hasn't changed."""
+    st = os.stat(yaml_path)
+    cached = _read_cache(cache_path)
+    if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[3]
+
+    raw = yaml_path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    if cached and cached[2] == digest:
+        # touched but not edited (fresh checkout, git stash, ...)
+        _write_cache(cache_path, st, digest, cached[3])
+        return cached[3]
+
+    import yaml   # only needed when the cache has to be rebuilt
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    value = build(yaml.load(raw, Loader=loader))
+    _write_cache(cache_path, st, digest, value)
+    return value
+
+
+def _build_registry(data: Any) -> List[dict]:
+    companies = validate_companies(data)
+    log.info("Rebuilt feed registry: %d companies", len(companies))
+    return companies
+
+
+def load_companies(yaml_path: Path = COMPANIES_YAML, cache_path: Path = CACHE_FILE) -> List[dict]:
+    return load_compiled_yaml(yaml_path, cache_path, _build_registry)
@@ -0,0 +1,303 @@
+import hashlib
+import logging
+import ssl
+import time
+import weakref
+from collections import Counter
+from dataclasses import dataclass, field, fields
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+import certifi
+
+from src.crawler import metrics
+from src.crawler.json_stream import JsonArrayStream
+from src.crawler.schemas import FetchState
+
+log = logging.getLogger("http_client")
+
+# ── pool defaults ──────────────────────────────────────────────────────
+# ~190 feeds, most of them on boards-api.greenhouse.io, so the per-host cap
+# matters more than the global one.
+POOL_LIMIT = 100
+POOL_LIMIT_PER_HOST = 8
+DNS_TTL = 300          # seconds a resolved host stays in aiohttp's DNS cache
+KEEPALIVE_TIMEOUT = 30  # seconds an idle pooled connection is kept open
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=20)
+
+
+@dataclass
+class HttpStats:
+    """Connection accounting for one crawl run, filled in by aiohttp tracing."""
+
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    dns_cache_hits: int = 0
+    dns_cache_misses: int = 0
+    requests_per_host: Counter = field(default_factory=Counter)
+    connections_per_host: Counter = field(default_factory=Counter)
+
+    def reset(self) -> None:
+        """Start a fresh count (daemon cycles share one session)."""
+        fresh = HttpStats()
+        for f in fields(self):
+            setattr(self, f.name, getattr(fresh, f.name))
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.connections_created + self.connections_reused
+        return self.connections_reused / total if total else 0.0
+
+    def report(self) -> str:
+        lines = [
+            f"requests={self.requests} "
+            f"new_connections={self.connections_created} "
+            f"reused_connections={self.connections_reused} "
+            f"reuse_ratio={self.reuse_ratio:.0%} "
+            f"dns_hits={self.dns_cache_hits} dns_misses={self.dns_cache_misses}"
+        ]
+        for host, n in self.requests_per_host.most_common():
+            lines.append(f"  {host}: {n} requests over {self.connections_per_host[host]} connections")
+        return "\n".join(lines)
+
+
+Throttle = Callable[[str], Awaitable[None]]
+
+# session -> the throttle it was created with
+_throttles: "weakref.WeakKeyDictionary[aiohttp.ClientSession, Throttle]" = weakref.WeakKeyDictionary()
+
+
+async def wait_turn(session: aiohttp.ClientSession, url: str) -> None:
+    """
+    Wait for *url*'s host rate limit on *session*, if it has one. Call it
+    right before session.get/post: aiohttp starts a request's ClientTimeout
+    before any trace hook or middleware runs, so a wait in there would count
+    against – and could time out – the request itself.
+    """
+    throttle = _throttles.get(session)
+    if throttle is None:
+        return
+    t0 = time.perf_counter()
+    await throttle(urlparse(url).hostname or "")
+    metrics.record("throttle", time.perf_counter() - t0)
+
+
+def _trace_config(stats: HttpStats) -> aiohttp.TraceConfig:
+    """Connection accounting for the run, plus per-feed network stages (see metrics)."""
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx: SimpleNamespace, params):
+        stats.requests += 1
+        stats.requests_per_host[params.url.host] += 1
+        ctx.host = params.url.host
+        ctx.sent_at = time.perf_counter()
+        ctx.setup = 0.0   # pool wait + dns + connect, taken out of ttfb
+        ctx.dns = 0.0
+
+    async def on_request_end(session, ctx: SimpleNamespace, params):
+        metrics.record("ttfb", time.perf_counter() - ctx.sent_at - ctx.setup)
+
+    async def on_response_chunk_received(session, ctx: SimpleNamespace, params):
+        metrics.record_bytes(len(params.chunk))
+
+    async def on_connection_queued_start(session, ctx: SimpleNamespace, params):
+        ctx.queued_at = time.perf_counter()
+
+    async def on_connection_queued_end(session, ctx: SimpleNamespace, params):
+        waited = time.perf_counter() - ctx.queued_at
+        ctx.setup += waited
+        metrics.record("pool_wait", waited)
+
+    async def on_connection_create_start(session, ctx: SimpleNamespace, params):
+        ctx.connect_at = time.perf_counter()
+
+    async def on_connection_create_end(session, ctx: SimpleNamespace, params):
+        stats.connections_created += 1
+        stats.connections_per_host[getattr(ctx, "host", "?")] += 1
+        elapsed = time.perf_counter() - ctx.connect_at
+        ctx.setup += elapsed
+        metrics.record("connect", elapsed - ctx.dns)   # resolving happens inside connect
+
+    async def on_connection_reuseconn(session, ctx: SimpleNamespace, params):
+        stats.connections_reused += 1
+
+    async def on_dns_resolvehost_start(session, ctx: SimpleNamespace, params):
+        ctx.resolve_at = time.perf_counter()
+
+    async def on_dns_resolvehost_end(session, ctx: SimpleNamespace, params):
+        elapsed = time.perf_counter() - ctx.resolve_at
+        ctx.dns += elapsed
+        metrics.record("dns", elapsed)
+
+    async def on_dns_cache_hit(session, ctx: SimpleNamespace, params):
+        stats.dns_cache_hits += 1
+
+    async def on_dns_cache_miss(session, ctx: SimpleNamespace, params):
+        stats.dns_cache_misses += 1
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_response_chunk_received.append(on_response_chunk_received)
+    trace.on_connection_queued_start.append(on_connection_queued_start)
+    trace.on_connection_queued_end.append(on_connection_queued_end)
+    trace.on_connection_create_start.append(on_connection_create_start)
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+    trace.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    trace.on_dns_cache_hit.append(on_dns_cache_hit)
+    trace.on_dns_cache_miss.append(on_dns_cache_miss)
+    return trace
+
+
+def create_http_session(
+    stats: HttpStats,
+    limit: int = POOL_LIMIT,
+    limit_per_host: int = POOL_LIMIT_PER_HOST,
+    throttle: Optional[Throttle] = None,
+    resolver: Optional[aiohttp.abc.AbstractResolver] = None,
+) -> aiohttp.ClientSession:
+    """
+    Build the run-scoped client shared by every adapter.
+
+    One connector means keep-alive sockets, cached DNS answers and a single
+    SSLContext (one CA bundle load) are shared across feeds, so repeated hits
+    on the same ATS host skip the TCP and TLS handshakes entirely.
+    *throttle* is where per-host rate limits plug in: wait_turn() awaits it
+    with the host before each request. *resolver* overrides DNS (benchmarks point
+    the real ATS hostnames at a local stub). Caller owns the session and must
+    close it.
+    """
+    ssl_ctx = ssl.create_default_context(cafile=certifi.where())
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=DNS_TTL,
+        use_dns_cache=True,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ssl=ssl_ctx,
+        resolver=resolver,
+    )
+    session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=DEFAULT_TIMEOUT,
+        trace_configs=[_trace_config(stats)],
+    )
+    if throttle is not None:
+        _throttles[session] = throttle
+    return session
+
+
+# ── conditional fetch ──────────────────────────────────────────────────
+class FeedUnchanged(Exception):
+    """The feed matches its stored validators; nothing to parse or write."""
+
+
+def body_digest(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+STREAM_CHUNK = 64 * 1024
+
+
+def _conditional_headers(state: Optional[FetchState], headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+    req_headers = {"Accept": "application/json", **(headers or {})}
+    if state is not None:
+        if state.etag:
+            req_headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            req_headers["If-Modified-Since"] = state.last_modified
+    return req_headers
+
+
+async def fetch_conditional(
+    session: aiohttp.ClientSession,
+    url: str,
+    state: Optional[FetchState],
+    headers: Optional[Dict[str, str]] = None,
+) -> bytes:
+    """
+    GET *url* with If-None-Match / If-Modified-Since taken from *state*.
+
+    Raises FeedUnchanged on a 304 or when the body hashes to the stored digest.
+    Otherwise returns the raw body and updates *state* in place with the new
+    validators – the caller decides whether to persist them.
+    """
+    await wait_turn(session, url)
+    async with session.get(url, headers=_conditional_headers(state, headers)) as resp:
+        if resp.status == 304:
+            raise FeedUnchanged("304 Not Modified")
+        resp.raise_for_status()
+        with metrics.stage("download"):
+            body = await resp.read()
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+
+    if state is None:
+        return body
+
+    digest = body_digest(body)
+    unchanged = digest == state.body_hash
+    state.etag, state.last_modified, state.body_hash = etag, last_modified, digest
+    if unchanged:
+        raise FeedUnchanged("payload hash unchanged")
+    return body
+
+
+async def _read_chunks(content: aiohttp.StreamReader) -> AsyncIterator[bytes]:
+    """iter_chunked, booking only the time spent waiting on the network as download."""
+    chunks = content.iter_chunked(STREAM_CHUNK).__aiter__()
+    while True:
+        t0 = time.perf_counter()
+        try:
+            chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            return
+        finally:
+            metrics.record("download", time.perf_counter() - t0)
+        metrics.record_bytes(len(chunk))   # the chunk trace hook only fires for read()
+        yield chunk
+
+
+async def stream_conditional(
+    session: aiohttp.ClientSession,
+    url: str,
+    state: Optional[FetchState],
+    key: str,
+    headers: Optional[Dict[str, str]] = None,
+) -> AsyncIterator[Any]:
+    """
+    Streaming twin of fetch_conditional: yields the decoded elements of the
+    top-level *key* array as their bytes arrive, never holding the whole body.
+
+    The body hash is computed on the fly, so an unchanged payload is only
+    detected at the end – FeedUnchanged is raised after the last element and
+    the caller must discard what it collected.
+    """
+    await wait_turn(session, url)
+    async with session.get(url, headers=_conditional_headers(state, headers)) as resp:
+        if resp.status == 304:
+            raise FeedUnchanged("304 Not Modified")
+        resp.raise_for_status()
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+
+        digest = hashlib.blake2b(digest_size=16)
+        decoder = JsonArrayStream(key)
+        async for chunk in _read_chunks(resp.content):
+            digest.update(chunk)
+            with metrics.stage("decode"):
+                items = decoder.feed(chunk)
+            for item in items:
+                yield item
+
+    if state is None:
+        return
+
+    unchanged = digest.hexdigest() == state.body_hash
+    state.etag, state.last_modified, state.body_hash = etag, last_modified, digest.hexdigest()
+    if unchanged:
+        raise FeedUnchanged("payload hash unchanged")
@@ -0,0 +1,116 @@
+import json
+import re
+from typing import Any, List, Optional
+
+# structural bytes outside strings / bytes that matter inside a string
+_STRUCT_RE = re.compile(rb'["{}\[\]]')
+_IN_STRING_RE = re.compile(rb'["\\]')
+
+_QUOTE, _BACKSLASH = 0x22, 0x5C
+_OPEN = (0x7B, 0x5B)    # { [
+_CLOSE_ARRAY = 0x5D     # ]
+
+
+class JsonArrayStream:
+    """
+    Pull the object elements of one top-level array field out of a JSON
+    document fed in arbitrary chunks, e.g. the "jobs" list of
+    {"jobs": [{...}, {...}], "meta": {...}}.
+
+    Only the bytes of the element currently being read are buffered, so
+    memory is bounded by the largest single element rather than the whole
+    document. Each element is decoded with json.loads once it is complete.
+    Scalar array elements are ignored.
+    """
+
+    def __init__(self, key: str):
+        self._key = key.encode()
+        self._buf = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._str_start = -1
+        self._last_key: Optional[bytes] = None   # last string closed at depth 1
+        self._array_depth: Optional[int] = None  # depth inside the target array
+        self._item_start = -1
+        self._done = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Consume *chunk*; return the elements completed by it, in order."""
+        buf = self._buf
+        buf += chunk
+        pos = self._pos
+        items: List[Any] = []
+
+        while True:
+            if self._in_string:
+                m = _IN_STRING_RE.search(buf, pos)
+                if m is None:
+                    pos = len(buf)
+                    break
+                i = m.start()
+                if buf[i] == _BACKSLASH:
+                    if i + 1 >= len(buf):   # escape split across chunks
+                        pos = i
+                        break
+                    pos = i + 2
+                    continue
+                self._in_string = False
+                pos = i + 1
+                if self._depth == 1:
+                    self._last_key = bytes(buf[self._str_start + 1:i])
+                continue
+
+            m = _STRUCT_RE.search(buf, pos)
+            if m is None:
+                pos = len(buf)
+                break
+            i = m.start()
+            c = buf[i]
+            pos = i + 1
+
+            if c == _QUOTE:
+                self._in_string = True
+                self._str_start = i
+            elif c in _OPEN:
+                if self._depth == self._array_depth and self._item_start < 0:
+                    self._item_start = i
+                self._depth += 1
+                if (
+                    c == 0x5B and self._depth == 2 and not self._done
+                    and self._array_depth is None and self._last_key == self._key
+                ):
+                    self._array_depth = 2
+            else:
+                self._depth -= 1
+                if self._array_depth is None:
+                    continue
+                if self._depth == self._array_depth and self._item_start >= 0:
+                    items.append(json.loads(buf[self._item_start:i + 1]))
+                    self._item_start = -1
+                elif c == _CLOSE_ARRAY and self._depth == self._array_depth - 1:
+                    self._array_depth = None
+                    self._done = True
+
+        # drop everything already consumed, keeping an element in progress
+        # (or a depth-1 string that may turn out to be the key we want)
+        if self._item_start >= 0:
+            keep = self._item_start
+        elif self._in_string and self._depth == 1:
+            keep = self._str_start
+        else:
+            keep = pos
+        if keep:
+            del buf[:keep]
+            pos -= keep
+            if self._item_start >= 0:
+                self._item_start -= keep
+            if self._in_string:
+                self._str_start -= keep
+        self._pos = pos
+        return items
+
+    @property
+    def found(self) -> bool:
+        """True once the target array has been fully read."""
+        return self._done
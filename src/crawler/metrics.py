@@ -0,0 +1,259 @@
+"""
+Where a crawl run's time goes, per feed and per stage.
+
+Fetch-side stages are booked against the feed being crawled through a
+context variable, so adapters, the HTTP trace hooks and the parse helpers
+can record into it without any plumbing:
+
+    throttle      waiting on the per-host rate limit
+    pool_wait     waiting for a free connection slot
+    dns           resolver time (DNS cache misses only)
+    connect       TCP + TLS handshake of new pooled connections
+    ttfb          request sent → response headers
+    download      reading the body
+    decode        JSON decode
+    parse         raw entries → Job (dates, location parsing)
+    browser       custom crawlers (re)capturing a session in Chromium
+    queue_wait    blocked handing the feed to the DB writers
+
+Write-side stages (upsert, which also queues the alerts, deactivate,
+save_state, commit) are timed once per writer batch, which usually spans
+several feeds; deactivate is additionally booked on each feed. Times are summed, so a feed
+that issues several requests can report more stage time than wall time.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# upper bounds (seconds) of the exported Prometheus histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+@dataclass
+class FeedTimings:
+    company: str
+    ats: str
+    url: str
+    status: str = "ok"   # ok | unchanged | fetch_error | db_error
+    seconds: float = 0.0   # wall time from fetch slot to hand-off
+    bytes: int = 0
+    jobs: Optional[int] = None
+    stages: Dict[str, float] = field(default_factory=dict)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+_current: ContextVar[Optional[FeedTimings]] = ContextVar("feed_timings", default=None)
+
+
+def current_feed() -> Optional[FeedTimings]:
+    return _current.get()
+
+
+def record(stage: str, seconds: float) -> None:
+    """Book *seconds* of *stage* on the feed being crawled, if any."""
+    feed = _current.get()
+    if feed is not None:
+        feed.add(stage, seconds)
+
+
+def record_bytes(n: int) -> None:
+    feed = _current.get()
+    if feed is not None:
+        feed.bytes += n
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    feed = _current.get()
+    if feed is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        feed.add(name, time.perf_counter() - t0)
+
+
+@contextmanager
+def collect_stages() -> Iterator[FeedTimings]:
+    """Record into a scratch feed – used in parse-pool children, whose stages are shipped back."""
+    token = _current.set(FeedTimings("", "", ""))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class CrawlMetrics:
+    """Timings of one crawl cycle, exported as a Prometheus textfile and a JSON report."""
+
+    def __init__(self) -> None:
+        self.started_at = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.feeds: List[FeedTimings] = []
+        self.batch_stages: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def track_feed(self, company: str, ats: str, url: str) -> Iterator[FeedTimings]:
+        feed = FeedTimings(company, ats, url)
+        self.feeds.append(feed)
+        token = _current.set(feed)
+        t0 = time.perf_counter()
+        try:
+            yield feed
+        finally:
+            feed.seconds = time.perf_counter() - t0
+            _current.reset(token)
+
+    @contextmanager
+    def batch_stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.batch_stages.append((name, time.perf_counter() - t0))
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self._t0
+
+    # ── aggregation ───────────────────────────────────────────────────
+    def stage_values(self) -> Dict[str, List[float]]:
+        values: Dict[str, List[float]] = {}
+        for feed in self.feeds:
+            for name, seconds in feed.stages.items():
+                if name != "deactivate":   # already counted per batch
+                    values.setdefault(name, []).append(seconds)
+        for name, seconds in self.batch_stages:
+            values.setdefault(name, []).append(seconds)
+        return values
+
+    def slowest_feeds(self, n: int) -> List[FeedTimings]:
+        return sorted(self.feeds, key=lambda f: f.seconds, reverse=True)[:n]
+
+    def status_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for feed in self.feeds:
+            counts[feed.status] = counts.get(feed.status, 0) + 1
+        return counts
+
+    def report(self, top: int = 5) -> str:
+        """Short log summary: costliest stages and slowest feeds."""
+        totals = sorted(
+            ((name, sum(v)) for name, v in self.stage_values().items()), key=lambda x: x[1], reverse=True
+        )
+        lines = ["stage time: " + " ".join(f"{name}={secs:.1f}s" for name, secs in totals)]
+        for feed in self.slowest_feeds(top):
+            lines.append(
+                f"  {feed.company} / {feed.ats}: {feed.seconds:.2f}s {feed.bytes / 1024:.0f} KiB "
+                f"({', '.join(f'{k}={v:.2f}' for k, v in sorted(feed.stages.items()))})"
+            )
+        return "\n".join(lines)
+
+    # ── export ────────────────────────────────────────────────────────
+    def to_prometheus(self, top: int = 10) -> str:
+        out = [
+            "# HELP crawler_stage_seconds Time per crawl stage (fetch stages per feed, write stages per batch).",
+            "# TYPE crawler_stage_seconds histogram",
+        ]
+        for name, values in sorted(self.stage_values().items()):
+            out += self._histogram("crawler_stage_seconds", f'stage="{name}"', values)
+
+        out += [
+            "# HELP crawler_feed_seconds Wall time per feed, fetch slot to hand-off.",
+            "# TYPE crawler_feed_seconds histogram",
+        ]
+        out += self._histogram("crawler_feed_seconds", "", [f.seconds for f in self.feeds])
+
+        out += ["# HELP crawler_feeds Feeds crawled in the last run by outcome.", "# TYPE crawler_feeds gauge"]
+        out += [f'crawler_feeds{{status="{s}"}} {n}' for s, n in sorted(self.status_counts().items())]
+
+        out += [
+            "# HELP crawler_slowest_feed_seconds Slowest feeds of the last run.",
+            "# TYPE crawler_slowest_feed_seconds gauge",
+        ]
+        out += [
+            f'crawler_slowest_feed_seconds{{company="{_label(f.company)}",ats="{_label(f.ats)}"}} {f.seconds:.6f}'
+            for f in self.slowest_feeds(top)
+        ]
+
+        out += [
+            "# TYPE crawler_run_bytes gauge",
+            f"crawler_run_bytes {sum(f.bytes for f in self.feeds)}",
+            "# TYPE crawler_run_jobs gauge",
+            f"crawler_run_jobs {sum(f.jobs or 0 for f in self.feeds)}",
+            "# TYPE crawler_run_duration_seconds gauge",
+            f"crawler_run_duration_seconds {self.duration or 0:.6f}",
+            "# TYPE crawler_last_run_timestamp_seconds gauge",
+            f"crawler_last_run_timestamp_seconds {self.started_at.timestamp():.0f}",
+        ]
+        return "\n".join(out) + "\n"
+
+    @staticmethod
+    def _histogram(metric: str, labels: str, values: List[float]) -> List[str]:
+        sep = "," if labels else ""
+        lines = [
+            f'{metric}_bucket{{{labels}{sep}le="{bound}"}} {sum(1 for v in values if v <= bound)}'
+            for bound in BUCKETS
+        ]
+        lines.append(f'{metric}_bucket{{{labels}{sep}le="+Inf"}} {len(values)}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{metric}_sum{suffix} {sum(values):.6f}")
+        lines.append(f"{metric}_count{suffix} {len(values)}")
+        return lines
+
+    def to_json(self, top: int = 10) -> dict:
+        stages = {}
+        for name, values in sorted(self.stage_values().items()):
+            values = sorted(values)
+            stages[name] = {
+                "count": len(values),
+                "total": round(sum(values), 6),
+                "p50": round(_quantile(values, 0.5), 6),
+                "p95": round(_quantile(values, 0.95), 6),
+                "max": round(values[-1], 6),
+            }
+        return {
+            "started_at": self.started_at.isoformat(),
+            "duration": self.duration,
+            "feeds": self.status_counts(),
+            "bytes": sum(f.bytes for f in self.feeds),
+            "jobs": sum(f.jobs or 0 for f in self.feeds),
+            "stages": stages,
+            "slowest_feeds": [asdict(f) for f in self.slowest_feeds(top)],
+            "all_feeds": [asdict(f) for f in self.feeds],
+        }
+
+    def write(self, prometheus_path: Optional[str], json_path: Optional[str], top: int = 10) -> None:
+        if prometheus_path:
+            _write_atomic(prometheus_path, self.to_prometheus(top))
+        if json_path:
+            _write_atomic(json_path, json.dumps(self.to_json(top), indent=2, default=str))
+
+
+def _write_atomic(path: str, text: str) -> None:
+    """Scrapers (node_exporter's textfile collector) must never see a half-written file."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_text(text)
+    os.replace(tmp, target)
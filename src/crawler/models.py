@@ -1,4 +1,9 @@
-from sqlalchemy import Column,String,DateTime,Integer,Boolean,Text,UniqueConstraint,ARRAY,func
+import zlib
+from typing import Optional
+
+from sqlalchemy import Column,String,DateTime,Integer,BigInteger,Boolean,UniqueConstraint,ARRAY,Float,Index,LargeBinary,func,text
+from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime, timezone
 from shared.db.base import Base
 
@@ -8,9 +13,15 @@ class JobRecord(Base):
     __tablename__="jobs"
     __table_args__ = (
     UniqueConstraint("external_id", "company", "source_feed", name="uq_job_key"),
+    # a feed's postings: fingerprints, known ids, deactivation (uq_job_key
+    # leads with external_id, so it can't serve a per-feed lookup)
+    Index("ix_jobs_feed", "company", "source_feed", "external_id"),
+    # closed postings oldest first, for archive_closed_jobs
+    Index("ix_jobs_closed", "updated_at", postgresql_where=text("NOT is_active")),
 )
 
-    id=Column(Integer,primary_key=True,autoincrement=True)
+    # bigint: job_alert_queue / job_alerts already store it as one
+    id=Column(BigInteger,primary_key=True,autoincrement=True)
     external_id=Column(String,nullable=False)
     department=Column(String,nullable=True)
     team=Column(String,nullable=True)
@@ -24,13 +35,108 @@ class JobRecord(Base):
     apply_url = Column(String, nullable=True)
     source_feed = Column(String, nullable=False)
     is_active=Column(Boolean,default=True)
-    description=Column(Text,nullable=True)
+    description_hash=Column(String(32),nullable=True)   # job_descriptions.hash; NULL = no description
     posted_at = Column(DateTime(timezone=True), server_default=func.now())  
     job_updated_at = Column(DateTime(timezone=True), nullable=True)
+    content_hash = Column(String(32), nullable=True)   # Job.content_hash(); NULL on rows written before it
     created_at =  Column(DateTime(timezone=True), server_default=func.now(),nullable=False)
     updated_at =  Column(DateTime(timezone=True), server_default=func.now(),onupdate=func.now(), nullable=False)
-    
-    
 
+    # never loaded implicitly: select(JobRecord) stays free of description
+    # bytes, and reading it without .options(selectinload(JobRecord.description_row))
+    # raises instead of issuing a query per row
+    description_row = relationship(
+        "JobDescription",
+        primaryjoin="foreign(JobRecord.description_hash) == JobDescription.hash",
+        lazy="raise",
+        viewonly=True,
+    )
+
+    @property
+    def description(self) -> Optional[str]:
+        return self.description_row.text if self.description_row is not None else None
+
+
+class JobDescription(Base):
+    """
+    Posting descriptions, out of line and zlib-compressed, keyed by
+    description_key() so postings with identical text share one row.
+    Rows are immutable – an edited description is a new key.
+    """
+    __tablename__="job_descriptions"
+
+    hash=Column(String(32),primary_key=True)
+    body=Column(LargeBinary,nullable=False)
+    created_at=Column(DateTime(timezone=True),server_default=func.now(),nullable=False)
+
+    @staticmethod
+    def compress(description: str) -> bytes:
+        return zlib.compress(description.strip().encode(), 6)
+
+    @property
+    def text(self) -> str:
+        return zlib.decompress(self.body).decode()
+
+
+class JobArchive(Base):
+    """
+    Cold copy of postings closed longer than archive.after_days, moved out of
+    `jobs` so the hot table only holds current and recently closed roles.
+    Keeps the original id, so queued and sent alerts still point at the row.
+    """
+    __tablename__="jobs_archive"
+
+    id=Column(BigInteger,primary_key=True,autoincrement=False)
+    external_id=Column(String,nullable=False)
+    department=Column(String,nullable=True)
+    team=Column(String,nullable=True)
+    company=Column(String,nullable=False)
+    title=Column(String,nullable=False)
+    employment_type=Column(String,nullable=True)
+    countries=Column(ARRAY(String),nullable=True)
+    cities=Column(ARRAY(String),nullable=True)
+    is_remote=Column(Boolean,default=False)
+    job_url = Column(String, nullable=False)
+    apply_url = Column(String, nullable=True)
+    source_feed = Column(String, nullable=False)
+    is_active=Column(Boolean,default=False)
+    description_hash=Column(String(32),nullable=True)
+    posted_at = Column(DateTime(timezone=True), nullable=True)
+    job_updated_at = Column(DateTime(timezone=True), nullable=True)
+    content_hash = Column(String(32), nullable=True)
+    created_at =  Column(DateTime(timezone=True), nullable=False)
+    updated_at =  Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class FeedState(Base):
+    __tablename__="feed_state"
+    __table_args__ = (
+    UniqueConstraint("company", "source_feed", "url", name="uq_feed_key"),
+)
+
+    id=Column(Integer,primary_key=True,autoincrement=True)
+    company=Column(String,nullable=False)
+    source_feed=Column(String,nullable=False)
+    url=Column(String,nullable=False)
+    etag=Column(String,nullable=True)
+    last_modified=Column(String,nullable=True)
+    body_hash=Column(String,nullable=True)
+    last_crawled_at=Column(DateTime(timezone=True),nullable=True)
+    last_changed_at=Column(DateTime(timezone=True),nullable=True)
+    change_rate=Column(Float,nullable=False,server_default="1.0")
+    job_count=Column(Integer,nullable=True)
+    poll_interval=Column(Integer,nullable=True)
+    next_due_at=Column(DateTime(timezone=True),nullable=True)
+    last_full_sweep_at=Column(DateTime(timezone=True),nullable=True)
+    updated_at =  Column(DateTime(timezone=True), server_default=func.now(),onupdate=func.now(), nullable=False)
+
+
+class SessionArtifact(Base):
+    """Browser-captured session data (cookies, headers, build ids) reused by plain HTTP calls until it expires."""
+    __tablename__="session_artifacts"
 
-    
\ No newline at end of file
+    name=Column(String,primary_key=True)
+    data=Column(JSONB,nullable=False)
+    captured_at=Column(DateTime(timezone=True),nullable=False)
+    expires_at=Column(DateTime(timezone=True),nullable=False)
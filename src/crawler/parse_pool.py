@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import fields
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.crawler import metrics
+from src.crawler.schemas import Job
+
+log = logging.getLogger("parse_pool")
+
+# (company, raw body) -> jobs; must be a module-level function so it pickles
+PayloadParser = Callable[[str, bytes], List[Job]]
+
+_JOB_FIELDS = tuple(f.name for f in fields(Job))
+
+
+def _parse_to_rows(parser: PayloadParser, company: str, body: bytes) -> Tuple[List[Tuple], Dict[str, float]]:
+    """
+    Runs in the child: ship plain tuples back, they pickle smaller and faster
+    than Jobs. The child's decode/parse timings travel back alongside.
+    """
+    with metrics.collect_stages() as timings:
+        jobs = parser(company, body)
+    return [tuple(getattr(job, name) for name in _JOB_FIELDS) for job in jobs], timings.stages
+
+
+def _warm_up() -> None:
+    """Import the pool-parsed adapters (and their location-parser tables) once per child."""
+    import src.crawler.adapters.ashby  # noqa: F401
+    import src.crawler.adapters.greenhouse  # noqa: F401
+    import src.crawler.adapters.lever  # noqa: F401
+
+
+def create_parse_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Spawned (not forked) children: the parent runs an event loop plus
+    aiohttp's resolver threads, which fork does not copy safely.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_warm_up,
+    )
+
+
+async def parse_payload(
+    parser: PayloadParser, company: str, body: bytes, pool: Optional[Executor] = None
+) -> List[Job]:
+    """Parse inline on the event loop, or in *pool* when one is given."""
+    if pool is None:
+        return parser(company, body)
+    rows, stages = await asyncio.get_running_loop().run_in_executor(pool, _parse_to_rows, parser, company, body)
+    for stage, seconds in stages.items():
+        metrics.record(stage, seconds)
+    return [Job(*row) for row in rows]
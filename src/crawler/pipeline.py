@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from src.crawler.config import PipelineConfig, PollingConfig
+from src.crawler.db import get_session
+from src.crawler.metrics import CrawlMetrics, FeedTimings
+from src.crawler.scheduler import CrawlScheduler, record_crawl
+from src.crawler.schemas import FetchState, Job
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+log = logging.getLogger("pipeline")
+
+
+@dataclass
+class FeedBatch:
+    """One feed's output on its way to the writer."""
+
+    company: str
+    source_feed: str
+    url: str
+    jobs: Optional[List[Job]]            # None = unchanged feed, only `state` to save
+    state: Optional[FetchState] = None   # validators + polling stats, saved with the jobs
+    timings: Optional[FeedTimings] = None   # the feed's metrics entry, for write-side stages
+
+
+@dataclass
+class PipelineStats:
+    batches: int = 0
+    feeds: int = 0
+    jobs: int = 0
+    failed_feeds: int = 0
+    max_queue_depth: int = 0
+    queue_depth_sum: int = 0
+    queue_depth_samples: int = 0
+    producer_wait: float = 0.0   # seconds producers spent blocked on a full queue
+    write_time: float = 0.0
+    batch_feed_sizes: List[int] = field(default_factory=list)
+    batch_job_sizes: List[int] = field(default_factory=list)
+
+    def sample_depth(self, depth: int) -> None:
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self.queue_depth_sum += depth
+        self.queue_depth_samples += 1
+
+    def report(self) -> str:
+        avg_depth = self.queue_depth_sum / self.queue_depth_samples if self.queue_depth_samples else 0
+        avg_feeds = sum(self.batch_feed_sizes) / len(self.batch_feed_sizes) if self.batch_feed_sizes else 0
+        max_jobs = max(self.batch_job_sizes, default=0)
+        return (
+            f"batches={self.batches} feeds={self.feeds} jobs={self.jobs} failed_feeds={self.failed_feeds} "
+            f"queue_depth(avg={avg_depth:.1f} max={self.max_queue_depth}) "
+            f"feeds_per_batch(avg={avg_feeds:.1f}) max_jobs_per_batch={max_jobs} "
+            f"producer_wait={self.producer_wait:.1f}s write_time={self.write_time:.1f}s"
+        )
+
+
+async def write_feed_batches(
+    batches: List[FeedBatch],
+    session: "AsyncSession",
+    polling: PollingConfig,
+    metrics: Optional[CrawlMetrics] = None,
+) -> None:
+    """
+    Merge several feeds into one transaction: one staged upsert that also
+    queues alerts for the new and changed postings, then per-feed
+    deactivation and the feed state. Caller commits.
+    """
+    from src.crawler.db_utils import bulk_upsert_jobs, deactivate_missing, save_fetch_states
+
+    metrics = metrics or CrawlMetrics()
+    moved_feeds = set()   # id() of batches with at least one new/changed posting
+    written = [b for b in batches if b.jobs is not None]
+    if written:
+        with metrics.batch_stage("upsert"):
+            # also queues the alerts; unchanged postings come back uncounted
+            changes = await bulk_upsert_jobs([job for b in written for job in b.jobs], session)
+        moved_feeds = {id(b) for b in written if (b.company, b.source_feed) in changes}
+
+        with metrics.batch_stage("deactivate"):
+            for b in written:
+                if b.state is not None and b.state.partial:
+                    continue   # incremental crawl: unseen postings were simply not paged to
+                t0 = time.perf_counter()
+                await deactivate_missing(b.company, b.source_feed, [j.external_id for j in b.jobs], session)
+                if b.timings is not None:
+                    b.timings.add("deactivate", time.perf_counter() - t0)
+
+    now = datetime.now(timezone.utc)
+    states = {}
+    for b in batches:
+        if b.state is None:
+            continue
+        # an incremental crawl only saw a prefix of the board, not its size
+        job_count = len(b.jobs) if b.jobs is not None and not b.state.partial else None
+        # a shrinking board is a change too (postings were closed)
+        moved = id(b) in moved_feeds or (job_count is not None and job_count != b.state.job_count)
+        states[(b.company, b.source_feed, b.url)] = record_crawl(b.state, moved, job_count, now, polling)
+    with metrics.batch_stage("save_state"):
+        await save_fetch_states(states, session)
+
+
+class CrawlPipeline:
+    """
+    Bounded queue between fetch/parse tasks and a few DB writer tasks.
+
+    Producers block on submit() while the queue is full, which is what slows
+    fetching down when the database falls behind. Each writer drains up to
+    max_feeds_per_batch feeds (or max_jobs_per_batch jobs) into a single
+    transaction; if that transaction fails the feeds are retried one by one
+    so a single bad feed cannot sink its neighbours.
+    """
+
+    def __init__(
+        self,
+        config: PipelineConfig,
+        scheduler: CrawlScheduler,
+        polling: PollingConfig,
+        metrics: Optional[CrawlMetrics] = None,
+    ):
+        self.config = config
+        self.scheduler = scheduler
+        self.polling = polling
+        self.metrics = metrics or CrawlMetrics()
+        self.queue: "asyncio.Queue[Optional[FeedBatch]]" = asyncio.Queue(maxsize=config.queue_size)
+        self.stats = PipelineStats()
+        self._writers: List[asyncio.Task] = []
+
+    async def __aenter__(self) -> "CrawlPipeline":
+        self._writers = [asyncio.create_task(self._writer()) for _ in range(self.config.writers)]
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        for _ in self._writers:
+            await self.queue.put(None)
+        await asyncio.gather(*self._writers)
+
+    async def submit(self, batch: FeedBatch) -> None:
+        t0 = time.monotonic()
+        await self.queue.put(batch)
+        self.stats.producer_wait += time.monotonic() - t0
+        self.stats.sample_depth(self.queue.qsize())
+
+    async def _next_batch(self) -> Tuple[List[FeedBatch], bool]:
+        """Block for one feed, then linger briefly to coalesce more. Returns (batch, stop)."""
+        first = await self.queue.get()
+        if first is None:
+            return [], True
+
+        self.stats.sample_depth(self.queue.qsize())
+        if self.queue.empty() and self.config.linger:
+            await asyncio.sleep(self.config.linger)
+
+        batch, n_jobs = [first], len(first.jobs or ())
+        while len(batch) < self.config.max_feeds_per_batch and n_jobs < self.config.max_jobs_per_batch:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            n_jobs += len(item.jobs or ())
+        return batch, False
+
+    async def _writer(self) -> None:
+        while True:
+            batch, stop = await self._next_batch()
+            if batch:
+                await self._write(batch)
+            if stop:
+                return
+
+    async def _write(self, batch: List[FeedBatch]) -> None:
+        t0 = time.monotonic()
+        async with self.scheduler.db_slot():
+            try:
+                await self._commit(batch)
+            except Exception as exc:
+                if len(batch) == 1:
+                    self._failed(batch[0], exc)
+                else:
+                    log.warning("Batch of %d feeds failed (%s) – retrying feed by feed", len(batch), exc)
+                    for item in batch:
+                        try:
+                            await self._commit([item])
+                        except Exception as item_exc:
+                            self._failed(item, item_exc)
+        self.stats.write_time += time.monotonic() - t0
+
+    async def _commit(self, batch: List[FeedBatch]) -> None:
+        async for session in get_session():
+            await write_feed_batches(batch, session, self.polling, self.metrics)
+            with self.metrics.batch_stage("commit"):
+                await session.commit()
+
+        n_jobs = sum(len(b.jobs or ()) for b in batch)
+        self.stats.batches += 1
+        self.stats.feeds += len(batch)
+        self.stats.jobs += n_jobs
+        self.stats.batch_feed_sizes.append(len(batch))
+        self.stats.batch_job_sizes.append(n_jobs)
+        for b in batch:
+            if b.jobs is not None:
+                log.info("%s / %s – upserted %d rows", b.company, b.source_feed, len(b.jobs))
+
+    def _failed(self, item: FeedBatch, exc: Exception) -> None:
+        self.stats.failed_feeds += 1
+        if item.timings is not None:
+            item.timings.status = "db_error"
+        log.error("Database error %s / %s: %s", item.company, item.source_feed, exc)
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlparse
+
+from src.crawler.config import Limit, PollingConfig, SchedulerConfig
+from src.crawler.schemas import FetchState
+
+log = logging.getLogger("scheduler")
+
+
+class TokenBucket:
+    """Classic token bucket; waiters are served in arrival order."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(max(1, burst or rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class CrawlScheduler:
+    """
+    Admission control for one crawl run.
+
+    Fetch slots are layered per-ATS → per-host → global, acquired most
+    specific first so a feed queued behind its own host never holds a global
+    slot another host could use. DB slots are a separate pool: a feed gives
+    its network slot back before it waits for a database slot.
+    Request-level rate limits are enforced by throttle(), which
+    http_client.wait_turn() awaits before every outgoing request (paged
+    adapters included), outside the request's timeout.
+    """
+
+    def __init__(self, config: SchedulerConfig):
+        self.config = config
+        self._fetch = asyncio.Semaphore(config.fetch_concurrency)
+        self._db = asyncio.Semaphore(config.db_concurrency)
+        self._host_sems: Dict[str, Optional[asyncio.Semaphore]] = {}
+        self._ats_sems: Dict[str, Optional[asyncio.Semaphore]] = {}
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self.throttle_wait: Dict[str, float] = defaultdict(float)
+
+    def _host_limit(self, host: str) -> Limit:
+        if host in self.config.hosts:
+            return self.config.hosts[host]
+        # ".example.com" keys cover every subdomain, each host still limited on its own
+        suffixes = [k for k in self.config.hosts if k.startswith(".") and host.endswith(k)]
+        return self.config.hosts[max(suffixes, key=len)] if suffixes else self.config.default_host
+
+    def _host_sem(self, host: str) -> Optional[asyncio.Semaphore]:
+        if host not in self._host_sems:
+            cap = self._host_limit(host).concurrency
+            self._host_sems[host] = asyncio.Semaphore(cap) if cap else None
+        return self._host_sems[host]
+
+    def _ats_sem(self, ats: str) -> Optional[asyncio.Semaphore]:
+        if ats not in self._ats_sems:
+            cap = self.config.ats.get(ats, Limit()).concurrency
+            self._ats_sems[ats] = asyncio.Semaphore(cap) if cap else None
+        return self._ats_sems[ats]
+
+    @asynccontextmanager
+    async def fetch_slot(self, ats: str, url: str) -> AsyncIterator[None]:
+        host = urlparse(url).hostname or ""
+        async with AsyncExitStack() as stack:
+            for sem in (self._ats_sem(ats), self._host_sem(host), self._fetch):
+                if sem is not None:
+                    await stack.enter_async_context(sem)
+            yield
+
+    @asynccontextmanager
+    async def db_slot(self) -> AsyncIterator[None]:
+        async with self._db:
+            yield
+
+    async def throttle(self, host: str) -> None:
+        if host not in self._buckets:
+            limit = self._host_limit(host)
+            self._buckets[host] = TokenBucket(limit.rate, limit.burst) if limit.rate else None
+        bucket = self._buckets[host]
+        if bucket is not None:
+            self.throttle_wait[host] += await bucket.acquire()
+
+    def reset_report(self) -> None:
+        self.throttle_wait.clear()
+
+    def report(self) -> str:
+        waits = sorted(self.throttle_wait.items(), key=lambda kv: kv[1], reverse=True)
+        return "\n".join(f"  {host}: {secs:.1f}s waiting on rate limit" for host, secs in waits if secs)
+
+
+# ── adaptive polling ───────────────────────────────────────────────────
+def is_due(state: Optional[FetchState], now: datetime, config: PollingConfig) -> bool:
+    """Never-seen feeds are always due; others once next_due_at is (almost) reached."""
+    if state is None or state.next_due_at is None:
+        return True
+    return state.next_due_at <= now + timedelta(seconds=config.due_slack)
+
+
+def full_sweep_due(state: Optional[FetchState], now: datetime, config: PollingConfig) -> bool:
+    """Whether a paged feed must read every page this time (incremental off, or sweep overdue)."""
+    if not config.incremental or state is None or state.last_full_sweep_at is None:
+        return True
+    return state.last_full_sweep_at <= now - timedelta(seconds=config.full_sweep_interval - config.due_slack)
+
+
+def record_crawl(
+    state: FetchState,
+    changed: bool,
+    job_count: Optional[int],
+    now: datetime,
+    config: PollingConfig,
+) -> FetchState:
+    """
+    Return *state* updated with the outcome of one crawl.
+
+    A change snaps the interval back to min_interval; every unchanged crawl
+    multiplies it by `backoff` up to max_interval. Boards whose change_rate
+    EWMA stays busy are capped at two cron ticks so their alerts stay fresh.
+    """
+    change_rate = config.alpha * float(changed) + (1 - config.alpha) * state.change_rate
+    if changed:
+        interval = config.min_interval
+    else:
+        cap = 2 * config.min_interval if change_rate >= config.busy_change_rate else config.max_interval
+        interval = min(cap, (state.poll_interval or config.min_interval) * config.backoff)
+
+    return replace(
+        state,
+        last_crawled_at=now,
+        last_changed_at=now if changed else state.last_changed_at,
+        change_rate=change_rate,
+        job_count=job_count if job_count is not None else state.job_count,
+        poll_interval=int(interval),
+        next_due_at=now + timedelta(seconds=int(interval)),
+    )
@@ -1,6 +1,8 @@
+import hashlib
+import json
 from dataclasses import asdict, dataclass,field
 from datetime import datetime,timezone
-from typing import Any, Dict,Optional,List
+from typing import Any, Dict,Optional,List,Tuple
 
 @dataclass(frozen=True, slots=True)
 class Job:
@@ -29,4 +31,64 @@ class Job:
     
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
\ No newline at end of file
+        return asdict(self)
+
+    def content_hash(self) -> str:
+        """
+        Digest of everything stored about the posting, normalised so that
+        only real edits change it: stripped text, location lists in sorted
+        order, timestamps in UTC.
+        """
+        def ts(value: Optional[datetime]) -> Optional[str]:
+            return value.astimezone(timezone.utc).isoformat() if value else None
+
+        def text(value: Optional[str]) -> Optional[str]:
+            return value.strip() if value else None
+
+        fields = [
+            text(self.title), text(self.department), text(self.team), text(self.employment_type),
+            sorted(self.countries or ()), sorted(self.cities or ()), bool(self.is_remote),
+            text(self.job_url), text(self.apply_url), text(self.description),
+            ts(self.posted_at), ts(self.job_updated_at),
+        ]
+        raw = json.dumps(fields, ensure_ascii=False, separators=(",", ":")).encode()
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    def description_hash(self) -> Optional[str]:
+        """Key of the description in job_descriptions (see description_key)."""
+        return description_key(self.description)
+
+
+def description_key(description: Optional[str]) -> Optional[str]:
+    """
+    Digest of a posting description (stripped), or None if there is none.
+    Postings sharing boilerplate text share one job_descriptions row.
+    """
+    if not description or not description.strip():
+        return None
+    return hashlib.blake2b(description.strip().encode(), digest_size=16).hexdigest()
+
+
+FeedKey = Tuple[str, str, str]   # (company, source_feed, url)
+
+
+@dataclass(slots=True)
+class FetchState:
+    """Per-feed state remembered between runs: fetch validators plus polling stats."""
+
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    body_hash: Optional[str] = None
+
+    last_crawled_at: Optional[datetime] = None
+    last_changed_at: Optional[datetime] = None
+    change_rate: float = 1.0             # EWMA of "this crawl found a change"
+    job_count: Optional[int] = None
+    poll_interval: Optional[int] = None  # seconds
+    next_due_at: Optional[datetime] = None
+    last_full_sweep_at: Optional[datetime] = None   # paged feeds: last crawl that read every page
+
+    # per-run only, never persisted – see Adapter.incremental
+    known_jobs: Optional[Dict[str, datetime]] = None   # external_id -> job_updated_at of active rows
+    incremental: bool = False    # adapter may stop at the first page holding nothing new
+    partial: bool = False        # set by the adapter when it did: the jobs are a prefix of the board
@@ -1,107 +1,365 @@
-import asyncio, logging, importlib.resources, yaml, sqlalchemy, sqlalchemy.orm, sqlalchemy.ext.asyncio
-from typing import List
+import argparse, asyncio, logging, os, random, signal, time
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Collection, Dict, List, Optional, Tuple
+
+import aiohttp
 
 from src.crawler.adapters import ADAPTER_REGISTRY
-from src.crawler.db_utils import bulk_upsert_jobs, deactivate_missing, enqueue_job_alerts
-from src.crawler.schemas import Job 
+from src.crawler.adapters.base import wants_known_jobs
+from src.crawler.schemas import FeedKey, FetchState, Job
 from src.crawler.db import init_db, get_session
-from src.crawler.models import JobRecord
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from src.crawler.http_client import FeedUnchanged, HttpStats, create_http_session
+from src.crawler.config import ArchiveConfig, CrawlConfig, PollingConfig, load_config
+from src.crawler.scheduler import CrawlScheduler, full_sweep_due, is_due
+from src.crawler.pipeline import CrawlPipeline, FeedBatch
+from src.crawler.parse_pool import create_parse_pool
+from src.crawler.feed_registry import COMPANIES_YAML, load_companies
+from src.crawler.custom.artifacts import ArtifactStore
+from src.crawler.custom.browser import BrowserPool
+from src.crawler import metrics
+from src.crawler.metrics import CrawlMetrics
 
 log = logging.getLogger("worker")
 logging.basicConfig(level=logging.INFO)
 
 # ── helpers ────────────────────────────────────────────────────────────
-def load_companies() -> List[dict]:
-    yaml_path = importlib.resources.files("src.crawler") / "companies.yaml"
-    with open(yaml_path) as f:
-        return yaml.safe_load(f)
+def crawlable_companies(companies: List[dict]) -> List[dict]:
+    """
+    companies.yaml minus the feeds no adapter can crawl, each warned about
+    once per load. Left in, such a feed would fail every cycle, never record
+    a crawl and so stay due (and have its known jobs loaded) every time.
+    """
+    kept = []
+    for company in companies:
+        feeds = []
+        for feed in company.get("feeds", []):
+            adapter_cls = ADAPTER_REGISTRY.get(feed["ats"])
+            if adapter_cls is None:
+                log.warning("Skipping %s / %s: no adapter for this ats", company["name"], feed["ats"])
+            elif not adapter_cls.handles(feed["url"]):
+                log.warning("Skipping %s / %s: no crawler for %s", company["name"], feed["ats"], feed["url"])
+            else:
+                feeds.append(feed)
+        kept.append({**company, "feeds": feeds})
+    return kept
+
+
+def select_due_feeds(
+    companies: List[dict],
+    states: Dict[FeedKey, FetchState],
+    polling: PollingConfig,
+    force: bool = False,
+    force_companies: Collection[str] = (),
+) -> List[Tuple[str, dict]]:
+    """Feeds to crawl this run: due by their adaptive interval, or forced."""
+    now = datetime.now(timezone.utc)
+    forced = {c.lower() for c in force_companies}
+    return [
+        (company["name"], feed)
+        for company in companies
+        for feed in company.get("feeds", [])
+        if force
+        or company["name"].lower() in forced
+        or is_due(states.get((company["name"], feed["ats"], feed["url"])), now, polling)
+    ]
+
+
+@dataclass
+class CrawlResources:
+    """Long-lived pieces reused by every cycle: warm HTTP pool, rate limits, parse pool, browser."""
+
+    config: CrawlConfig
+    http: aiohttp.ClientSession
+    http_stats: HttpStats
+    scheduler: CrawlScheduler
+    artifacts: ArtifactStore
+    parse_pool: Optional[Executor] = None
+    stopping: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+@dataclass
+class CrawlRun:
+    """What every feed task of one cycle shares."""
+
+    http: aiohttp.ClientSession
+    scheduler: CrawlScheduler
+    pipeline: CrawlPipeline
+    config: CrawlConfig
+    artifacts: Optional[ArtifactStore] = None
+    parse_pool: Optional[Executor] = None
+    stopping: Optional[asyncio.Event] = None
+    metrics: CrawlMetrics = field(default_factory=CrawlMetrics)
+
+
+async def archive_closed(config: ArchiveConfig, stopping: Optional[asyncio.Event] = None) -> int:
+    """
+    Move postings closed longer than config.after_days to jobs_archive, one
+    transaction per batch so crawl writers never wait long on its locks.
+    Stops after max_batches (the rest waits for the next run) or on shutdown.
+    """
+    if config.after_days is None:
+        return 0
+    from src.crawler.db_utils import archive_closed_jobs
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=config.after_days)
+    moved = 0
+    try:
+        for _ in range(config.max_batches):
+            if stopping is not None and stopping.is_set():
+                break
+            async for session in get_session():
+                batch = await archive_closed_jobs(cutoff, config.batch_size, session)
+                await session.commit()
+            moved += batch
+            if batch < config.batch_size:
+                break
+    except Exception as exc:
+        # the crawl itself is done – a failed archive pass just retries next run
+        log.error("Archiving closed postings failed after %d rows: %s", moved, exc)
+    if moved:
+        log.info("Archived %d postings closed before %s", moved, cutoff.date())
+    return moved
 
 
 # ── adapter wrapper with full error handling ──────────────────────────
-async def process_feed(company: str, feed: dict, sem: asyncio.Semaphore):
-    """Process a single company feed with comprehensive error handling."""
+async def process_feed(
+    run: CrawlRun,
+    company: str,
+    feed: dict,
+    prev_state: Optional[FetchState] = None,
+    known_jobs: Optional[Dict[str, datetime]] = None,
+):
+    """
+    Fetch and parse a single company feed, then hand it to the DB writers.
+
+    Database work happens in the pipeline's writer tasks; a feed that fails
+    to fetch is dropped here and never reaches the queue.
+    """
+    # adapters update validators in place, so never hand them the shared copy
+    state = replace(prev_state) if prev_state else FetchState()
     try:
         adapter_cls = ADAPTER_REGISTRY.get(feed["ats"])
         if not adapter_cls:
             log.warning("No adapter for %s", feed["ats"])
             return
+        if wants_known_jobs(adapter_cls):
+            state.known_jobs = known_jobs
+        if adapter_cls.incremental:
+            state.incremental = bool(known_jobs) and not full_sweep_due(
+                prev_state, datetime.now(timezone.utc), run.config.polling
+            )
 
         # ── API fetch (with existing error handling) ──────────────────
-        async with sem:                       
-            try:
-                adapter = adapter_cls()
-                jobs: List[Job] = await adapter.fetch_jobs(company, feed["url"])
-            except Exception as exc:
-                log.error("Fetch error %s / %s: %s", company, feed["ats"], exc)
-                return
+        async with run.scheduler.fetch_slot(feed["ats"], feed["url"]):
+            if run.stopping is not None and run.stopping.is_set():
+                return   # shutting down: finish in-flight feeds, start no new ones
+            with run.metrics.track_feed(company, feed["ats"], feed["url"]) as timings:
+                try:
+                    adapter = adapter_cls(
+                        # a process pool takes precedence over in-loop streaming
+                        streaming=run.config.parsing.streaming and run.parse_pool is None,
+                        parse_pool=run.parse_pool,
+                        artifacts=run.artifacts,
+                    )
+                    jobs: Optional[List[Job]] = await adapter.fetch_jobs(run.http, company, feed["url"], state)
+                except FeedUnchanged as exc:
+                    # nothing moved since the last processed fetch – skip parse and
+                    # job writes; the writer only records the crawl for polling
+                    log.info("%s / %s – unchanged (%s)", company, feed["ats"], exc)
+                    jobs = None
+                    timings.status = "unchanged"
+                except Exception as exc:
+                    log.error("Fetch error %s / %s: %s", company, feed["ats"], exc)
+                    timings.status = "fetch_error"
+                    return
+                timings.jobs = len(jobs) if jobs is not None else None
+                state.known_jobs = None   # don't carry the id map through the writer queue
+                if adapter_cls.incremental and not state.partial:
+                    state.last_full_sweep_at = datetime.now(timezone.utc)
 
-        # ── Database operations with error handling ───────────────────
-        try:
-            async for session in get_session():
-                existing_jobs= await session.execute(
-                    select(JobRecord)
-                    .where(JobRecord.company==company, JobRecord.source_feed==feed["ats"]))
-                
-                existing_jobs=existing_jobs.scalars().all()
-                existing_jobs_map={job.external_id:job for job in existing_jobs}
-
-                upsert_jobs=[]
-                jobs_to_alert=[]
-                for job in jobs:
-                    existing_job= existing_jobs_map.get(job.external_id)
-                    if not existing_job:
-                        upsert_jobs.append(job)
-                        jobs_to_alert.append(job)
-                    else:
-                        if existing_job.job_updated_at !=job.job_updated_at or existing_job.posted_at !=job.posted_at:
-                            upsert_jobs.append(job)
-                            jobs_to_alert.append(job)
-            
-                if upsert_jobs:
-                    await bulk_upsert_jobs(upsert_jobs, session)
-
-                if jobs_to_alert:
-                    await enqueue_job_alerts(jobs_to_alert, session)
-                
-                seen_ids = [job.external_id for job in jobs]
-                await deactivate_missing(company, feed["ats"], seen_ids, session)
-                await session.commit()
+                # Enqueue before giving the fetch slot back: when the writers fall
+                # behind, a full queue is what stops new downloads (no DB
+                # connection is held while waiting here).
+                with metrics.stage("queue_wait"):
+                    await run.pipeline.submit(
+                        FeedBatch(
+                            company=company,
+                            source_feed=feed["ats"],
+                            url=feed["url"],
+                            jobs=jobs,
+                            state=state,
+                            timings=timings,
+                        )
+                    )
 
-                log.info("%s / %s – upserted %d rows", company, feed["ats"], len(seen_ids))
-                
-        except Exception as exc:
-            log.error("Database error %s / %s: %s", company, feed["ats"], exc)
-            # Don't re-raise - let other feeds continue
-            return
-            
     except Exception as exc:
         # Catch-all for any unexpected errors
         log.error("Unexpected error processing %s / %s: %s", company, feed["ats"], exc)
         # Don't re-raise - let other feeds continue
 
 # ── main orchestrator with return_exceptions=True ─────────────────────
-async def run_once(concurrency: int = 10):
-    sem = asyncio.Semaphore(concurrency)
-    companies = load_companies()
-    tasks = [
-        process_feed(company["name"], feed, sem)
-        for company in companies
-        for feed in company.get("feeds", [])
-    ]
-    
-    # ⚠️ CRITICAL: Use return_exceptions=True to prevent cascade failures
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
+@asynccontextmanager
+async def crawl_resources(config: CrawlConfig) -> AsyncIterator[CrawlResources]:
+    scheduler = CrawlScheduler(config.scheduler)
+    stats = HttpStats()
+    parse_pool = create_parse_pool(config.parsing.pool_workers) if config.parsing.process_pool else None
+    # costs nothing until a custom crawler has to (re)capture a session
+    browsers = BrowserPool(config.browser)
+    try:
+        # one pooled client for the whole process – adapters borrow it, never close it
+        async with create_http_session(stats, throttle=scheduler.throttle) as http:
+            yield CrawlResources(
+                config=config, http=http, http_stats=stats, scheduler=scheduler,
+                artifacts=ArtifactStore(browsers), parse_pool=parse_pool,
+            )
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+        await browsers.close()
+
+
+async def crawl_cycle(
+    res: CrawlResources,
+    companies: List[dict],
+    force: bool = False,
+    force_companies: Collection[str] = (),
+):
+    from src.crawler.db_utils import load_fetch_states, load_known_jobs
+
+    config = res.config
+    async for session in get_session():
+        prev_states = await load_fetch_states(session)
+        due = select_due_feeds(companies, prev_states, config.polling, force, force_companies)
+        wanted = {
+            (name, feed["ats"]) for name, feed in due if wants_known_jobs(ADAPTER_REGISTRY.get(feed["ats"]))
+        }
+        known_jobs = await load_known_jobs(wanted, session)
+
+    total = sum(len(c.get("feeds", [])) for c in companies)
+    log.info("%d of %d feeds due this run", len(due), total)
+
+    cycle_metrics = CrawlMetrics()
+    async with CrawlPipeline(config.pipeline, res.scheduler, config.polling, cycle_metrics) as pipeline:
+        run = CrawlRun(
+            http=res.http, scheduler=res.scheduler, pipeline=pipeline, config=config,
+            artifacts=res.artifacts, parse_pool=res.parse_pool, stopping=res.stopping, metrics=cycle_metrics,
+        )
+        tasks = [
+            process_feed(
+                run, name, feed, prev_states.get((name, feed["ats"], feed["url"])), known_jobs.get((name, feed["ats"])),
+            )
+            for name, feed in due
+        ]
+
+        # ⚠️ CRITICAL: Use return_exceptions=True to prevent cascade failures
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    log.info("HTTP connection report:\n%s", res.http_stats.report())
+    log.info("Pipeline report: %s", pipeline.stats.report())
+    if res.scheduler.report():
+        log.info("Scheduler report:\n%s", res.scheduler.report())
+    if res.artifacts.captures or res.artifacts.hits:
+        log.info(
+            "Session artifacts: %d cached, %d captured (%d browser launches)",
+            res.artifacts.hits, res.artifacts.captures, res.artifacts.browsers.launches,
+        )
+    res.http_stats.reset()
+    res.scheduler.reset_report()
+
+    cycle_metrics.finish()
+    log.info("Timing report: %s", cycle_metrics.report())
+    try:
+        cycle_metrics.write(config.metrics.prometheus_path, config.metrics.json_path, config.metrics.top_feeds)
+    except OSError as exc:
+        log.error("Could not write metrics: %s", exc)
+
     # Optional: Log any unexpected exceptions that slipped through
     for i, result in enumerate(results):
         if isinstance(result, Exception):
             log.error("Task %d failed with unexpected exception: %s", i, result)
 
-async def main():
+async def run_once(
+    concurrency: Optional[int] = None,
+    force: bool = False,
+    force_companies: Collection[str] = (),
+):
+    config = load_config()
+    if concurrency is not None:
+        config = replace(config, scheduler=replace(config.scheduler, fetch_concurrency=concurrency))
+    async with crawl_resources(config) as res:
+        await crawl_cycle(res, crawlable_companies(load_companies()), force, force_companies)
+    await archive_closed(config.archive)
+
+async def run_daemon(interval: Optional[int] = None):
+    """
+    Stay up and crawl on an internal timer, reusing the DB engine, HTTP pool
+    and parse pool across cycles; closed postings are archived after each
+    cycle. companies.yaml is re-read whenever its mtime changes. SIGTERM/SIGINT
+    stop new feeds from starting, let in-flight ones and the writer queue
+    drain, then exit.
+    """
+    config = load_config()
+    interval = interval or config.daemon.interval
+    # feeds can't be due more often than the loop runs, nor less often than
+    # the adaptive floor allows – let the floor follow a faster loop
+    config = replace(config, polling=replace(
+        config.polling, min_interval=min(config.polling.min_interval, interval),
+    ))
+
+    async with crawl_resources(config) as res:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, res.stopping.set)
+
+        companies, mtime = crawlable_companies(load_companies()), os.stat(COMPANIES_YAML).st_mtime
+        log.info("Daemon up: every %ds ±%d%%", interval, config.daemon.jitter * 100)
+        while not res.stopping.is_set():
+            started = time.monotonic()
+            try:
+                # can be missing for a moment mid-save or mid-deploy
+                current = os.stat(COMPANIES_YAML).st_mtime
+                if current != mtime:
+                    companies, mtime = crawlable_companies(load_companies()), current
+                    log.info("companies.yaml changed – reloaded %d companies", len(companies))
+            except Exception as exc:
+                log.error("companies.yaml reload failed, keeping previous list: %s", exc)
+
+            try:
+                await crawl_cycle(res, companies)
+            except Exception as exc:
+                log.error("Crawl cycle failed: %s", exc)
+            # between cycles, while no writer is busy
+            await archive_closed(config.archive, res.stopping)
+
+            delay = interval * (1 + random.uniform(-config.daemon.jitter, config.daemon.jitter))
+            try:
+                await asyncio.wait_for(res.stopping.wait(), max(0.0, started + delay - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+    log.info("Daemon stopped")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Crawl ATS feeds into the jobs table.")
+    parser.add_argument("--force", action="store_true",
+                        help="crawl every feed, ignoring adaptive polling intervals")
+    parser.add_argument("--company", action="append", default=[], metavar="NAME",
+                        help="force-crawl this company's feeds (repeatable)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="stay up and crawl on an internal timer instead of once")
+    parser.add_argument("--interval", type=int, default=None, metavar="SECONDS",
+                        help="daemon cycle interval (default: daemon.interval in crawler.yaml)")
+    return parser.parse_args(argv)
+
+async def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
     await init_db()
-    await run_once()
+    if args.daemon:
+        await run_daemon(args.interval)
+    else:
+        await run_once(force=args.force, force_companies=args.company)
 
 # ── CLI entry ──────────────────────────────────────────────────────────
 if __name__ == "__main__":
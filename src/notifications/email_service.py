@@ -3,7 +3,7 @@ from collections import defaultdict
 from datetime import datetime
 import asyncio
 
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, tuple_
 
 from src.crawler.db import get_session
 from src.crawler.models import JobRecord
@@ -55,7 +55,13 @@ async def process_alerts():
                         )
                     )
 
-        await session.execute(delete(JobAlertQueue).where(JobAlertQueue.id.in_([a.id for a in alerts])))
+        # only the entries as read: one the crawler re-queued meanwhile (new
+        # updated_at) stays for the next run
+        await session.execute(
+            delete(JobAlertQueue).where(
+                tuple_(JobAlertQueue.id, JobAlertQueue.updated_at).in_([(a.id, a.updated_at) for a in alerts])
+            )
+        )
         await session.commit()
 
 
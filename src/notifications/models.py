@@ -1,4 +1,4 @@
-from sqlalchemy import Column,Integer,DateTime,func,BigInteger,ARRAY,Text,String,Boolean
+from sqlalchemy import Column,Integer,DateTime,func,BigInteger,ARRAY,Text,String,Boolean,UniqueConstraint
 from shared.db.base import Base
 
 class UserJobPref(Base):
@@ -17,6 +17,10 @@ class UserJobPref(Base):
 class JobAlertQueue(Base):
 
     __tablename__="job_alert_queue"
+    # one pending entry per job: re-queuing a job bumps updated_at instead
+    __table_args__ = (
+        UniqueConstraint("job_id", name="uq_alert_queue_job"),
+    )
 
     id=Column(BigInteger, primary_key=True, autoincrement=True)
     job_id=Column(BigInteger,nullable=False)